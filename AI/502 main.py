@@ -1,9 +1,12 @@
 import os
 import logging
-import requests
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
+import http_client
+import breaker
+from ai_cache import AnswerCache
+from ai_scheduler import AIScheduler, Busy, chat_priority, estimate_tokens
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +23,9 @@ AI_BACKEND_URL = "https://tiffyai-bot.onrender.com/ask"
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+answer_cache = AnswerCache()
+ai_scheduler = AIScheduler()
+
 # --- Command Handlers ---
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -44,8 +50,7 @@ async def trade(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def price(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        r = requests.get(PRICE_API_URL)
-        data = r.json()
+        data = await breaker.get("price").call(http_client.get_json, PRICE_API_URL, hedge=True)
         price = float(data.get("tiffyToUSD", 0))
         await update.message.reply_text(f"💎 Current $TIFFY: *${price:.4f}*", parse_mode="Markdown")
     except Exception as e:
@@ -58,8 +63,8 @@ async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"&contractaddress={TOKEN_CONTRACT}&page=1&offset=5&apikey={BSCSCAN_API_KEY}"
     )
     try:
-        r = requests.get(url)
-        holders = r.json().get("result", [])
+        data = await breaker.get("bscscan").call(http_client.get_json, url, hedge=True)
+        holders = data.get("result", [])
         if not holders:
             raise Exception("Empty result")
         msg = "🏆 *Top $TIFFY Holders:*\n\n"
@@ -77,28 +82,49 @@ async def ai(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not user_input:
         await update.message.reply_text("🤖 Ask something after `/ai`, e.g. `/ai What is TiffyAI?`", parse_mode="Markdown")
         return
+    messages = [
+        {"role": "system", "content": "You are TiffyAI, an ultra-intelligent Web3 oracle and crypto assistant."},
+        {"role": "user", "content": user_input}
+    ]
+    cached = answer_cache.get(messages)
+    if cached is not None:
+        await update.message.reply_text(cached)
+        return
     try:
-        response = requests.post(
-            AI_BACKEND_URL,
-            json={
-                "messages": [
-                    {"role": "system", "content": "You are TiffyAI, an ultra-intelligent Web3 oracle and crypto assistant."},
-                    {"role": "user", "content": user_input}
-                ]
-            },
-            timeout=15
-        )
-        response.raise_for_status()
-        reply = response.json()["choices"][0]["message"]["content"]
+        async with ai_scheduler.slot(chat_priority(update), estimate_tokens(messages)):
+            data = await breaker.get("ai_backend").call(
+                http_client.post_json,
+                AI_BACKEND_URL,
+                json={"messages": messages},
+                timeout=15
+            )
+        reply = data["choices"][0]["message"]["content"]
+        answer_cache.put(messages, reply)
         await update.message.reply_text(reply)
+    except Busy:
+        await update.message.reply_text("⏳ Tiffy is busy right now, try again in a moment.")
+    except breaker.CircuitOpen:
+        await update.message.reply_text("⚠️ AI backend unavailable, try again shortly.")
     except Exception as e:
         await update.message.reply_text("⚠️ AI backend error.")
         logger.error("AI request failed: %s", e)
 
 # --- Bot Bootstrap ---
 
+async def post_init(app):
+    await http_client.start()
+
+async def post_shutdown(app):
+    await http_client.close()
+
 def main():
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    app = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("claim", claim))
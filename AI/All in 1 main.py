@@ -2,10 +2,11 @@ import os
 import requests
 import logging
 from starlette.applications import Starlette
-from starlette.responses import HTMLResponse, PlainTextResponse, FileResponse
+from starlette.responses import HTMLResponse, PlainTextResponse
 from starlette.routing import Route
 from telegram import Update
 from telegram.ext import Application, CommandHandler
+from static_assets import StaticAssets
 
 logging.basicConfig(level=logging.INFO)
 BOT_TOKEN = os.getenv("BOT_TOKEN")
@@ -30,15 +31,14 @@ async def telegram_webhook(request):
 async def health(request):
     return PlainTextResponse("OK")
 
-# Serve your site (either static HTML or from GitHub hosted folder)
-async def website(request):
-    return FileResponse('AI/index.html')  # adjust path if needed
+# Serve the site from the optimized build (python build_assets.py)
+website = StaticAssets()
 
 # Setup Starlette App
 routes = [
-    Route("/", website),
     Route("/healthcheck", health),
     Route("/telegram", telegram_webhook, methods=["POST"]),
+    website.route(),  # catch-all, keep last
 ]
 
 star = Starlette(routes=routes)
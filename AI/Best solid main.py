@@ -6,10 +6,11 @@ from fastapi import FastAPI, Request
 import uvicorn
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
+import log_setup
 
 # --- Setup ---
 load_dotenv()
-logging.basicConfig(level=logging.INFO)
+log_setup.setup()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 RENDER_URL = os.getenv("RENDER_EXTERNAL_URL")
@@ -141,7 +142,7 @@ async def shutdown():
 @web.post("/telegram")
 async def incoming(request: Request):
     body = await request.json()
-    logging.info("📩 Telegram update: %s", body)
+    log_setup.log_update(body)
     update = Update.de_json(body, app.bot)
     await app.process_update(update)
     return {"status": "ok"}
@@ -1,13 +1,18 @@
 import os
+import json
+import time
 import logging
-import requests
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
-from openai import OpenAI
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
+import http_client
+import ai_client
+from ai_cache import AnswerCache
+from ai_scheduler import AIScheduler, Busy, PRIORITY_API, chat_priority, estimate_tokens
 
 # --- Setup ---
 load_dotenv()
@@ -16,9 +21,13 @@ logging.basicConfig(level=logging.INFO)
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 RENDER_URL = os.getenv("RENDER_EXTERNAL_URL")
 BSCSCAN_API_KEY = os.getenv("BSCSCAN_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Telegram allows roughly one edit per second per message.
+AI_EDIT_INTERVAL = float(os.getenv("AI_EDIT_INTERVAL", "1.0"))
+TELEGRAM_MAX_TEXT = 4096
+
+answer_cache = AnswerCache()
+ai_scheduler = AIScheduler()
 
 PRICE_API_URL = "https://tiffyai.github.io/TIFFY-Market-Value/price.json"
 TOKEN_CONTRACT = "0xE488253DD6B4D31431142F1b7601C96f24Fb7dd5"
@@ -41,8 +50,8 @@ async def claim(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def price(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        r = requests.get(PRICE_API_URL, timeout=5)
-        price = float(r.json().get("tiffyToUSD", 0))
+        data = await http_client.get_json(PRICE_API_URL, timeout=5)
+        price = float(data.get("tiffyToUSD", 0))
         await update.message.reply_text(
             f"💎 Current $TIFFY price: *${price:.4f}*",
             parse_mode="Markdown"
@@ -53,12 +62,12 @@ async def price(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        r = requests.get(
+        data = await http_client.get_json(
             f"https://api.bscscan.com/api?module=token&action=tokenholderlist"
             f"&contractaddress={TOKEN_CONTRACT}&page=1&offset=5&apikey={BSCSCAN_API_KEY}",
             timeout=5
         )
-        holders = r.json().get("result", [])
+        holders = data.get("result", [])
         msg = "🏆 Top $TIFFY Holders:\n"
         for h in holders[:5]:
             bal = int(h["TokenHolderQuantity"]) / 1e18
@@ -76,20 +85,30 @@ async def ai(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "🤖 Ask something with `/ai [your question]`, e.g. `/ai What is TIFFYAI?`"
         )
     logging.info("➡️ AI ask: %s", user_input)
+    messages = [
+        {"role": "system", "content": "You are TiffyAI, a Web3 oracle."},
+        {"role": "user", "content": user_input}
+    ]
+    cached = answer_cache.get(messages)
+    if cached is not None:
+        return await update.message.reply_text(cached[:TELEGRAM_MAX_TEXT])
+    reply = await update.message.reply_text("🤖 …")
+    text = ""
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are TiffyAI, a Web3 oracle."},
-                {"role": "user", "content": user_input}
-            ],
-            temperature=0.7
-        )
-        content = response.choices[0].message.content
-        await update.message.reply_text(content)
+        async with ai_scheduler.slot(chat_priority(update), estimate_tokens(messages)):
+            last_edit = time.monotonic()
+            async for delta in ai_client.stream(messages, model="gpt-3.5-turbo"):
+                text += delta
+                if time.monotonic() - last_edit >= AI_EDIT_INTERVAL:
+                    await reply.edit_text(text[:TELEGRAM_MAX_TEXT - 2] + " ▌")
+                    last_edit = time.monotonic()
+        answer_cache.put(messages, text)
+        await reply.edit_text(text[:TELEGRAM_MAX_TEXT] or "🤖 (no answer)")
+    except Busy:
+        await reply.edit_text("⏳ Tiffy is busy right now, try again in a moment.")
     except Exception as e:
         logging.error("AI error: %s", e)
-        await update.message.reply_text("⚠️ AI failed—check backend.")
+        await reply.edit_text(text[:TELEGRAM_MAX_TEXT] or "⚠️ AI failed—check backend.")
 
 app.add_handler(CommandHandler("start", start))
 app.add_handler(CommandHandler("claim", claim))
@@ -102,6 +121,7 @@ web = FastAPI()
 
 @web.on_event("startup")
 async def startup():
+    await http_client.start()
     await app.initialize()
     await app.start()
     await app.bot.delete_webhook(drop_pending_updates=True)
@@ -113,6 +133,7 @@ async def startup():
 async def shutdown():
     await app.stop()
     await app.shutdown()
+    await http_client.close()
 
 @web.post("/telegram")
 async def incoming(request: Request):
@@ -133,21 +154,52 @@ async def root():
 # --- Optional: External API call support for /ask ---
 class AskRequest(BaseModel):
     messages: list
+    stream: bool = False
 
 @web.post("/ask")
 async def ask(request: AskRequest):
+    logging.info("🔮 Incoming AI request: %s", request.messages)
+    cached = answer_cache.get(request.messages)
+    if cached is not None:
+        if request.stream:
+            async def replay():
+                yield ai_client.sse_chunk(cached)
+                yield ai_client.SSE_DONE
+            return StreamingResponse(replay(), media_type="text/event-stream")
+        return {"choices": [{"message": {"content": cached}}]}
+    if request.stream:
+        # The slot is taken inside the generator: a client that disconnects
+        # before Starlette starts iterating never holds one.
+        async def events():
+            text = ""
+            try:
+                async with ai_scheduler.slot(PRIORITY_API, estimate_tokens(request.messages)):
+                    async for delta in ai_client.stream(request.messages, model="gpt-3.5-turbo-1106"):
+                        text += delta
+                        yield ai_client.sse_chunk(delta)
+                answer_cache.put(request.messages, text)
+            except Exception as e:
+                logging.error("OpenAI stream failed: %s", e)
+                yield "data: " + json.dumps({"error": str(e)}) + "\n\n"
+            yield ai_client.SSE_DONE
+        return StreamingResponse(events(), media_type="text/event-stream")
     try:
-        logging.info("🔮 Incoming AI request: %s", request.messages)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo-1106",
-            messages=request.messages,
-            temperature=0.7
-        )
-        content = response.choices[0].message.content
+        await ai_scheduler.acquire(PRIORITY_API, estimate_tokens(request.messages))
+    except Busy as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    try:
+        content = await ai_client.complete(request.messages, model="gpt-3.5-turbo-1106")
+        answer_cache.put(request.messages, content)
         return {"choices": [{"message": {"content": content}}]}
     except Exception as e:
         logging.error("OpenAI request failed: %s", e)
         return {"error": str(e)}
+    finally:
+        ai_scheduler.release()
+
+@web.get("/ask/cache")
+async def ask_cache():
+    return {**answer_cache.stats(), "scheduler": ai_scheduler.stats()}
 
 # --- Launch ---
 if __name__ == "__main__":
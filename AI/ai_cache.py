@@ -0,0 +1,134 @@
+import os
+import re
+import math
+import time
+import zlib
+from collections import OrderedDict
+
+# --- AI answer cache ---
+# Exact tier: normalized (system prompt, question) -> answer, with TTL and
+# LRU eviction. Similarity tier: each question is also hashed into a small
+# character-trigram vector; a new question whose cosine similarity with a
+# cached one (same system prompt) reaches AI_CACHE_SIMILARITY reuses that
+# answer. Set AI_CACHE_SIMILARITY=0 to keep exact matches only.
+
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "512"))
+AI_CACHE_TTL_SECONDS = float(os.getenv("AI_CACHE_TTL_SECONDS", "3600"))
+AI_CACHE_SIMILARITY = float(os.getenv("AI_CACHE_SIMILARITY", "0.9"))
+VECTOR_DIM = 1024
+
+_punct = re.compile(r"[^\w\s]")
+_space = re.compile(r"\s+")
+
+
+def normalize(text):
+    return _space.sub(" ", _punct.sub(" ", text.lower())).strip()
+
+
+def vectorize(text):
+    # Sparse {bucket: weight}, unit length.
+    vec = {}
+    padded = f" {text} "
+    for i in range(len(padded) - 2):
+        bucket = zlib.crc32(padded[i:i + 3].encode()) % VECTOR_DIM
+        vec[bucket] = vec.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+    return {k: v / norm for k, v in vec.items()}
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+def _split(messages):
+    """(context, question): everything before the last user turn, and that turn."""
+    context = "\n".join(
+        f"{m.get('role')}:{normalize(str(m.get('content', '')))}" for m in messages[:-1]
+    )
+    question = normalize(str(messages[-1].get("content", ""))) if messages else ""
+    return context, question
+
+
+class AnswerCache:
+    def __init__(self, size=AI_CACHE_SIZE, ttl=AI_CACHE_TTL_SECONDS, similarity=AI_CACHE_SIMILARITY):
+        self.size = size
+        self.ttl = ttl
+        self.similarity = similarity
+        # (context, question) -> entry dict, oldest first
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _live(self, key, entry, now):
+        if entry["expires"] > now:
+            return True
+        del self.entries[key]
+        return False
+
+    def get(self, messages):
+        if not messages:
+            return None
+        now = time.time()
+        key = _split(messages)
+        entry = self.entries.get(key)
+        if entry is not None and self._live(key, entry, now):
+            self.entries.move_to_end(key)
+            entry["hits"] += 1
+            self.hits += 1
+            return entry["answer"]
+        if self.similarity > 0:
+            match = self._nearest(key, now)
+            if match is not None:
+                self.entries.move_to_end(match)
+                entry = self.entries[match]
+                entry["hits"] += 1
+                entry["similar_hits"] += 1
+                self.similar_hits += 1
+                return entry["answer"]
+        self.misses += 1
+        return None
+
+    def _nearest(self, key, now):
+        context, question = key
+        vec = vectorize(question)
+        best, best_score = None, self.similarity
+        for other, entry in list(self.entries.items()):
+            if other[0] != context or not self._live(other, entry, now):
+                continue
+            score = cosine(vec, entry["vec"])
+            if score >= best_score:
+                best, best_score = other, score
+        return best
+
+    def put(self, messages, answer):
+        if not messages or not answer:
+            return
+        key = _split(messages)
+        self.entries[key] = {
+            "answer": answer,
+            "expires": time.time() + self.ttl,
+            "vec": vectorize(key[1]) if self.similarity > 0 else None,
+            "hits": 0,
+            "similar_hits": 0,
+        }
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def stats(self, top=20):
+        lookups = self.hits + self.similar_hits + self.misses
+        hottest = sorted(self.entries.items(), key=lambda kv: kv[1]["hits"], reverse=True)[:top]
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.similar_hits) / lookups, 3) if lookups else 0.0,
+            "top": [
+                {"question": k[1], "hits": e["hits"], "similar_hits": e["similar_hits"]}
+                for k, e in hottest
+            ],
+        }
@@ -0,0 +1,60 @@
+import os
+import json
+import http_client
+
+# --- Async OpenAI-compatible chat client ---
+# Talks to any /chat/completions endpoint (OpenAI, or a local stub via
+# OPENAI_BASE_URL) over the shared HTTP pool, with token streaming.
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+AI_MODEL = os.getenv("AI_MODEL", "gpt-3.5-turbo")
+AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", "60"))
+
+
+def _headers():
+    headers = {"Content-Type": "application/json"}
+    if OPENAI_API_KEY:
+        headers["Authorization"] = f"Bearer {OPENAI_API_KEY}"
+    return headers
+
+
+async def complete(messages, model=AI_MODEL, temperature=0.7):
+    data = await http_client.post_json(
+        f"{OPENAI_BASE_URL}/chat/completions",
+        json={"model": model, "messages": messages, "temperature": temperature},
+        headers=_headers(),
+        timeout=AI_TIMEOUT,
+    )
+    return data["choices"][0]["message"]["content"]
+
+
+async def stream(messages, model=AI_MODEL, temperature=0.7):
+    """Yield content deltas as the backend produces them (SSE)."""
+    async with http_client.stream(
+        "POST",
+        f"{OPENAI_BASE_URL}/chat/completions",
+        json={"model": model, "messages": messages, "temperature": temperature, "stream": True},
+        headers=_headers(),
+        timeout=AI_TIMEOUT,
+    ) as r:
+        async for line in r.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            payload = line[5:].strip()
+            if payload == "[DONE]":
+                break
+            chunk = json.loads(payload)
+            if not chunk.get("choices"):
+                continue
+            delta = chunk["choices"][0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+def sse_chunk(content):
+    """Format one delta the way the OpenAI streaming API does."""
+    return "data: " + json.dumps({"choices": [{"delta": {"content": content}}]}) + "\n\n"
+
+
+SSE_DONE = "data: [DONE]\n\n"
@@ -0,0 +1,166 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import contextlib
+
+# --- AI request scheduler ---
+# Every LLM call takes a slot first. A slot needs:
+#   - a free concurrency seat (AI_MAX_CONCURRENCY)
+#   - one request from the requests/min bucket (AI_RPM)
+#   - the call's estimated tokens from the tokens/min bucket (AI_TPM)
+# Callers that cannot start immediately wait in a priority queue (DMs before
+# groups before the HTTP /ask API). If the queue is full, or the wait exceeds
+# AI_QUEUE_TIMEOUT, Busy is raised so the handler can answer "try again"
+# straight away instead of piling onto the upstream.
+
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+AI_RPM = float(os.getenv("AI_RPM", "60"))
+AI_TPM = float(os.getenv("AI_TPM", "40000"))
+AI_MAX_QUEUE = int(os.getenv("AI_MAX_QUEUE", "50"))
+AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", "20"))
+AI_REPLY_TOKENS = int(os.getenv("AI_REPLY_TOKENS", "400"))
+
+PRIORITY_DM = 0
+PRIORITY_GROUP = 1
+PRIORITY_API = 2
+
+
+class Busy(Exception):
+    pass
+
+
+def estimate_tokens(messages, reply_tokens=AI_REPLY_TOKENS):
+    # ~4 characters per token is close enough for budgeting.
+    chars = sum(len(str(m.get("content", ""))) for m in messages if isinstance(m, dict))
+    return chars // 4 + reply_tokens
+
+
+def chat_priority(update):
+    chat = getattr(update, "effective_chat", None)
+    return PRIORITY_DM if chat is not None and chat.type == "private" else PRIORITY_GROUP
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.stamp = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_for(self, amount):
+        """Seconds until `amount` is available (0 if it already is)."""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate else float("inf")
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+
+class AIScheduler:
+    def __init__(
+        self,
+        concurrency=AI_MAX_CONCURRENCY,
+        rpm=AI_RPM,
+        tpm=AI_TPM,
+        max_queue=AI_MAX_QUEUE,
+        queue_timeout=AI_QUEUE_TIMEOUT,
+    ):
+        self.concurrency = concurrency
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = []  # heap of (priority, seq, future, tokens)
+        self._seq = itertools.count()
+        self._timer = None
+        self.started = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+
+    def _ready(self, tokens):
+        self.requests.refill()
+        self.tokens.refill()
+        return max(self.requests.wait_for(1), self.tokens.wait_for(tokens))
+
+    def _grant(self, tokens):
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.active += 1
+        self.started += 1
+
+    def _wake(self):
+        self._timer = None
+        while self._waiters and self.active < self.concurrency:
+            _, _, fut, tokens = self._waiters[0]
+            if fut.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._ready(tokens)
+            if delay > 0:
+                # Head of the queue is waiting on a bucket; retry when it refills.
+                self._timer = asyncio.get_running_loop().call_later(delay, self._wake)
+                return
+            heapq.heappop(self._waiters)
+            self._grant(tokens)
+            fut.set_result(None)
+
+    async def acquire(self, priority=PRIORITY_GROUP, tokens=AI_REPLY_TOKENS):
+        if not self._waiters and self.active < self.concurrency and self._ready(tokens) == 0:
+            self._grant(tokens)
+            return
+        if len(self._waiters) >= self.max_queue:
+            # Drop entries left behind by timed-out or cancelled waiters.
+            self._waiters = [w for w in self._waiters if not w[2].done()]
+            heapq.heapify(self._waiters)
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Busy("AI queue full")
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut, tokens))
+        if self._timer is None:
+            self._wake()
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(fut, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise Busy("AI queue timeout")
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Granted just as we were cancelled: hand the seat back.
+                self.release()
+            raise
+        finally:
+            self.wait_total += time.monotonic() - queued_at
+
+    def release(self):
+        self.active -= 1
+        if self._timer is None:
+            self._wake()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority=PRIORITY_GROUP, tokens=AI_REPLY_TOKENS):
+        await self.acquire(priority, tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "queued": sum(1 for w in self._waiters if not w[2].done()),
+            "started": self.started,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.wait_total / self.started * 1000, 2) if self.started else 0.0,
+        }
@@ -0,0 +1,57 @@
+import os
+import time
+import asyncio
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+import uvicorn
+from ai_client import sse_chunk, SSE_DONE
+
+# --- Local stub of the chat completions API ---
+# For local runs and load tests: point OPENAI_BASE_URL at
+# http://localhost:8001/v1 and no real tokens are spent.
+#   STUB_FIRST_TOKEN_MS – delay before the first token
+#   STUB_TOKEN_MS       – delay between tokens
+
+STUB_FIRST_TOKEN_MS = float(os.getenv("STUB_FIRST_TOKEN_MS", "200"))
+STUB_TOKEN_MS = float(os.getenv("STUB_TOKEN_MS", "30"))
+STUB_REPLY = "TiffyAI is the Web3 oracle of the Blue Key portal. Use /claim to begin your journey."
+
+stub = FastAPI()
+
+
+class CompletionRequest(BaseModel):
+    messages: list
+    model: str = "stub"
+    temperature: float = 0.7
+    stream: bool = False
+
+
+def _reply(messages):
+    question = messages[-1].get("content", "") if messages else ""
+    return f"{STUB_REPLY} (you asked: {question})"
+
+
+@stub.post("/v1/chat/completions")
+async def completions(request: CompletionRequest):
+    reply = _reply(request.messages)
+    if not request.stream:
+        await asyncio.sleep((STUB_FIRST_TOKEN_MS + STUB_TOKEN_MS * len(reply.split())) / 1000)
+        return {
+            "id": f"stub-{time.time_ns()}",
+            "model": request.model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}}],
+        }
+
+    async def tokens():
+        await asyncio.sleep(STUB_FIRST_TOKEN_MS / 1000)
+        for i, word in enumerate(reply.split()):
+            yield sse_chunk(word if i == 0 else " " + word)
+            await asyncio.sleep(STUB_TOKEN_MS / 1000)
+        yield SSE_DONE
+
+    return StreamingResponse(tokens(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    uvicorn.run(stub, host="127.0.0.1", port=int(os.getenv("STUB_PORT", "8001")))
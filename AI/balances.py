@@ -0,0 +1,114 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+import rpc
+
+# --- Coalesced balanceOf lookups ---
+# /balance requests don't call the node one by one. A lookup first checks a
+# short-TTL per-address cache, then joins any call already in flight for the
+# same address, and otherwise waits in a pending set. The pending set is
+# flushed after BALANCE_BATCH_WINDOW_MS (or as soon as it reaches
+# BALANCE_BATCH_SIZE) as a single JSON-RPC batch of eth_call balanceOf
+# requests, so a burst of users costs a handful of round-trips.
+
+BALANCE_TTL_SECONDS = float(os.getenv("BALANCE_TTL_SECONDS", "15"))
+BALANCE_CACHE_SIZE = int(os.getenv("BALANCE_CACHE_SIZE", "10000"))
+BALANCE_BATCH_WINDOW_MS = float(os.getenv("BALANCE_BATCH_WINDOW_MS", "20"))
+BALANCE_BATCH_SIZE = int(os.getenv("BALANCE_BATCH_SIZE", "50"))
+BALANCE_TIMEOUT_SECONDS = float(os.getenv("BALANCE_TIMEOUT_SECONDS", "15"))
+
+BALANCE_OF = "0x70a08231"  # balanceOf(address)
+
+
+def balance_call(contract, address):
+    data = BALANCE_OF + "0" * 24 + address[2:].lower()
+    return "eth_call", [{"to": contract, "data": data}, "latest"]
+
+
+class BalanceReader:
+    def __init__(self, contract, rpc_url=rpc.BSC_RPC_URL, ttl=BALANCE_TTL_SECONDS,
+                 cache_size=BALANCE_CACHE_SIZE, window=BALANCE_BATCH_WINDOW_MS / 1000,
+                 batch_size=BALANCE_BATCH_SIZE, timeout=BALANCE_TIMEOUT_SECONDS):
+        self.contract = contract
+        self.rpc_url = rpc_url
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.window = window
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.cache = OrderedDict()  # address -> (raw balance, fetched_at)
+        self.inflight = {}          # address -> future
+        self.pending = []           # addresses waiting for the next batch
+        self._timer = None
+        self.hits = 0
+        self.lookups = 0
+        self.batches = 0
+
+    async def get(self, address):
+        """Raw balanceOf for address (int, token base units)."""
+        address = address.lower()
+        self.lookups += 1
+        cached = self.cache.get(address)
+        if cached is not None and time.time() - cached[1] < self.ttl:
+            self.hits += 1
+            return cached[0]
+        future = self.inflight.get(address)
+        if future is None:
+            future = self.inflight[address] = asyncio.get_running_loop().create_future()
+            self.pending.append(address)
+            if len(self.pending) >= self.batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            asyncio.ensure_future(self._fetch(batch))
+
+    async def _fetch(self, addresses):
+        self.batches += 1
+        try:
+            results = await rpc.batch(
+                [balance_call(self.contract, a) for a in addresses], url=self.rpc_url
+            )
+        except Exception as e:
+            logging.error("Balance batch error: %s", e)
+            results = [e] * len(addresses)
+        now = time.time()
+        # Every future gets resolved, whatever the node sent back: a stuck
+        # one would hang every later lookup of that address.
+        for i, address in enumerate(addresses):
+            future = self.inflight.pop(address)
+            try:
+                if i >= len(results):
+                    raise rpc.RPCError("missing result in batch response")
+                result = results[i]
+                if isinstance(result, Exception):
+                    raise result
+                balance = int(result, 16) if result not in ("0x", "") else 0
+            except Exception as e:
+                future.set_exception(e)
+                # Nobody may be left awaiting (all callers cancelled).
+                future.exception()
+                continue
+            self.cache[address] = (balance, now)
+            self.cache.move_to_end(address)
+            future.set_result(balance)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def stats(self):
+        return {
+            "lookups": self.lookups,
+            "cache_hits": self.hits,
+            "batches": self.batches,
+            "cached": len(self.cache),
+            "in_flight": len(self.inflight),
+        }
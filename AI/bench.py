@@ -0,0 +1,447 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+from urllib.parse import parse_qsl
+from collections import defaultdict, deque
+
+# --- Webhook load test ---
+# Runs main.py's FastAPI app in this process against local stubs of every
+# upstream (Telegram Bot API, price.json, BscScan, BSC RPC, AI backend),
+# each with injected latency. Updates are POSTed to /telegram at a fixed
+# rate (open loop, so a slow bot cannot slow the sender down). Reply latency
+# runs from the POST to the moment the stub Bot API receives the reply for
+# that chat. Every run is appended to a results file, and --compare checks
+# it against the previous run with the same label.
+#
+# Results go to BENCH_RESULTS (default AI/bench_results.jsonl, gitignored:
+# numbers are only comparable on the machine that produced them). Keep the
+# file on the bench machine, or point BENCH_RESULTS / --results at a shared
+# location, to compare across releases.
+#
+#   python bench.py --rate 200 --duration 20 --latency telegram=40,price=20
+#   python bench.py --updates recorded.jsonl --rate 50 --compare
+#   python bench.py --holders ...     # also run the holder index sync
+#   python bench.py --check-holders   # sync holders.py against the stub, check top/rank
+#
+# The RPC stub answers eth_blockNumber and eth_getLogs from the recorded
+# Transfer logs in holder_logs.json (mints, transfers, a burn), and eth_call
+# balanceOf with a fixed balance.
+#
+# The stubs run on their own thread and event loop, so their work does not
+# count against the bot's loop.
+
+BENCH_RESULTS = os.getenv("BENCH_RESULTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_results.jsonl"))
+BOT_TOKEN = "123456:bench"
+DEFAULT_LATENCY = "telegram=40,price=30,bscscan=150,rpc=80,ai=200"
+DEFAULT_MIX = "price=4,start=2,help=2,leaderboard=1,claim=1,wallet=1"
+HOLDER_LOGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "holder_logs.json")
+
+
+def load_holder_logs(path=HOLDER_LOGS):
+    with open(path) as f:
+        return json.load(f)
+
+
+def parse_weights(spec, cast=float):
+    out = {}
+    for item in spec.split(","):
+        if item.strip():
+            name, _, value = item.partition("=")
+            out[name.strip()] = cast(value)
+    return out
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(ordered, p):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+# --- Upstream stubs ---
+
+async def _fields(request):
+    """Bot API parameters from a urlencoded or multipart body (no
+    python-multipart needed; file parts are skipped)."""
+    body = await request.body()
+    ctype = request.headers.get("content-type", "")
+    if "multipart/form-data" not in ctype:
+        return dict(parse_qsl(body.decode()))
+    boundary = ("--" + ctype.split("boundary=", 1)[1].strip('"')).encode()
+    fields = {}
+    for part in body.split(boundary):
+        head, _, value = part.partition(b"\r\n\r\n")
+        if b"filename=" in head or b'name="' not in head:
+            continue
+        name = head.split(b'name="', 1)[1].split(b'"', 1)[0].decode()
+        fields[name] = value.rstrip(b"\r\n-").decode(errors="replace")
+    return fields
+
+
+class Stubs:
+    def __init__(self, latency, jitter):
+        self.latency = latency
+        self.jitter = jitter
+        self.port = free_port()
+        self.base = f"http://127.0.0.1:{self.port}"
+        self.replies = defaultdict(deque)  # chat_id -> perf_counter of each reply
+        self.calls = defaultdict(int)
+        self._server = None
+        self._thread = None
+
+    async def _delay(self, name):
+        ms = self.latency.get(name, 0)
+        if ms:
+            await asyncio.sleep(ms * random.uniform(1 - self.jitter, 1 + self.jitter) / 1000)
+
+    def app(self):
+        from fastapi import FastAPI, Request
+        import ai_stub
+
+        stub = FastAPI()
+        message_ids = iter(range(1, 1 << 62))
+
+        @stub.post("/bot{token}/{method}")
+        async def bot_api(token: str, method: str, request: Request):
+            self.calls["telegram"] += 1
+            form = await _fields(request)
+            await self._delay("telegram")
+            if method == "getMe":
+                result = {"id": 123456, "is_bot": True, "first_name": "Tiffy", "username": "TiffyAI_Bot"}
+            elif method == "getWebhookInfo":
+                result = {"url": form.get("url", ""), "has_custom_certificate": False, "pending_update_count": 0}
+            elif method in ("sendMessage", "sendPhoto"):
+                chat_id = int(form["chat_id"])
+                self.replies[chat_id].append(time.perf_counter())
+                result = {
+                    "message_id": next(message_ids),
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                }
+                if method == "sendPhoto":
+                    result["photo"] = [{"file_id": "bench", "file_unique_id": "bench", "width": 1, "height": 1}]
+                else:
+                    result["text"] = form.get("text", "")
+            else:
+                result = True
+            return {"ok": True, "result": result}
+
+        @stub.get("/price.json")
+        async def price():
+            self.calls["price"] += 1
+            await self._delay("price")
+            return {"tiffyToUSD": f"{random.uniform(0.01, 0.02):.6f}"}
+
+        @stub.get("/bscscan")
+        async def bscscan():
+            self.calls["bscscan"] += 1
+            await self._delay("bscscan")
+            return {"status": "1", "result": [
+                {"TokenHolderAddress": "0x" + f"{i:040x}", "TokenHolderQuantity": str((10 - i) * 10 ** 21)}
+                for i in range(1, 6)
+            ]}
+
+        @stub.post("/rpc")
+        async def rpc(request: Request):
+            self.calls["rpc"] += 1
+            body = await request.json()
+            await self._delay("rpc")
+            calls = body if isinstance(body, list) else [body]
+            out = [{"jsonrpc": "2.0", "id": c["id"], "result": self._rpc_result(c)} for c in calls]
+            return out if isinstance(body, list) else out[0]
+
+        self.holder_logs = load_holder_logs()
+        stub.mount("/ai", ai_stub.stub)
+        return stub
+
+    def _rpc_result(self, call):
+        method = call.get("method")
+        if method == "eth_blockNumber":
+            import holders
+            return hex(self.holder_logs["head"] + holders.HOLDERS_CONFIRMATIONS)
+        if method == "eth_getLogs":
+            query = call["params"][0]
+            lo, hi = int(query["fromBlock"], 16), int(query["toBlock"], 16)
+            return [log for log in self.holder_logs["logs"] if lo <= int(log["blockNumber"], 16) <= hi]
+        return hex(10 ** 21)  # eth_call balanceOf
+
+    def start(self):
+        import uvicorn
+        os.environ["STUB_FIRST_TOKEN_MS"] = str(self.latency.get("ai", 0))
+        config = uvicorn.Config(self.app(), host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(5)
+
+
+# --- Update streams ---
+
+def synthetic(count, mix, chats):
+    names, weights = zip(*mix.items())
+    for i in range(count):
+        chat_id = random.randint(1, chats)
+        text = "/" + random.choices(names, weights)[0]
+        yield {
+            "message": {
+                "message_id": i + 1,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": "bench"},
+                "text": text,
+                "entities": [{"type": "bot_command", "offset": 0, "length": len(text)}],
+            }
+        }
+
+
+def recorded(path, count):
+    with open(path) as f:
+        updates = [json.loads(line) for line in f if line.strip()]
+    for i in range(count):
+        yield dict(updates[i % len(updates)])
+
+
+def chat_of(update):
+    for key in ("message", "edited_message", "callback_query"):
+        if key in update:
+            item = update[key]
+            return (item.get("message") or item)["chat"]["id"] if key == "callback_query" else item["chat"]["id"]
+    return None
+
+
+# --- Run ---
+
+async def run(args, stubs):
+    import httpx
+    import main
+
+    await main.startup()
+    transport = httpx.ASGITransport(app=main.web)
+    sent = defaultdict(deque)
+    acks = []
+    statuses = defaultdict(int)
+    stream = recorded(args.updates, args.count) if args.updates else synthetic(args.count, parse_weights(args.mix), args.chats)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def post(update):
+            started = time.perf_counter()
+            r = await client.post("/telegram", json=update)
+            acks.append(time.perf_counter() - started)
+            status = r.json().get("status", str(r.status_code)) if r.status_code == 200 else str(r.status_code)
+            statuses[status] += 1
+            if status == "ok":
+                chat = chat_of(update)
+                if chat is not None:
+                    sent[chat].append(started)
+
+        t0 = time.perf_counter()
+        tasks = []
+        for i, update in enumerate(stream):
+            update["update_id"] = 10 ** 6 + i
+            delay = t0 + i / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(post(update)))
+        await asyncio.gather(*tasks)
+        send_elapsed = time.perf_counter() - t0
+
+        # Wait for the backlog to drain and replies to arrive.
+        expected = sum(len(v) for v in sent.values())
+        deadline = time.perf_counter() + args.drain
+        while time.perf_counter() < deadline:
+            if sum(len(stubs.replies[c]) for c in sent) >= expected and main.update_queue.pending == 0:
+                break
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - t0
+
+    latencies = []
+    last_reply = t0
+    for chat, times in sent.items():
+        for started, replied in zip(times, stubs.replies[chat]):
+            latencies.append(replied - started)
+            last_reply = max(last_reply, replied)
+    latencies.sort()
+    acks.sort()
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue = main.update_queue.stats()
+    await main.shutdown()
+
+    def ms(v):
+        return round(v * 1000, 2) if v is not None else None
+
+    return {
+        "sent": args.count,
+        "statuses": dict(statuses),
+        "replies": len(latencies),
+        "lost": expected - len(latencies),
+        "offered_rate": round(args.count / send_elapsed, 1),
+        "throughput": round(len(latencies) / max(last_reply - t0, 1e-9), 1),
+        "elapsed_s": round(elapsed, 2),
+        "reply_ms": {"p50": ms(percentile(latencies, 0.5)), "p95": ms(percentile(latencies, 0.95)),
+                     "p99": ms(percentile(latencies, 0.99)), "max": ms(latencies[-1] if latencies else None)},
+        "ack_ms": {"p50": ms(percentile(acks, 0.5)), "p99": ms(percentile(acks, 0.99))},
+        "queue_high_water": queue["high_water"],
+        "rss_peak_mb": round(rss_peak / 1024, 1),
+        "rss_growth_mb": round((rss_peak - rss_before) / 1024, 1),
+        "upstream_calls": dict(stubs.calls),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current, previous, tolerance):
+    """Return a list of regressions of current against previous."""
+    problems = []
+    if current["throughput"] < previous["throughput"] * (1 - tolerance):
+        problems.append(f"throughput {previous['throughput']} -> {current['throughput']}/s")
+    for p in ("p95", "p99"):
+        was, now = previous["reply_ms"][p], current["reply_ms"][p]
+        if was and now and now > was * (1 + tolerance):
+            problems.append(f"reply {p} {was} -> {now} ms")
+    if current["lost"] > previous["lost"]:
+        problems.append(f"lost replies {previous['lost']} -> {current['lost']}")
+    return problems
+
+
+async def check_holders(stubs):
+    """Sync a HolderIndex from the stub's recorded logs; return mismatches."""
+    import holders
+    import http_client
+    fixture = stubs.holder_logs
+    index = holders.HolderIndex(fixture["logs"][0]["address"], fixture["start_block"],
+                                rpc_url=f"{stubs.base}/rpc")
+    await http_client.start()
+    try:
+        await index.sync()
+    finally:
+        await http_client.close()
+    problems = []
+    top = [[a, str(b)] for a, b in index.top(len(fixture["expected"]["top"]) + 1)]
+    if top != fixture["expected"]["top"]:
+        problems.append(f"top: got {top}")
+    for address, want in fixture["expected"]["rank"].items():
+        place, raw, total = index.rank(address)
+        if [place, str(raw), total] != want:
+            problems.append(f"rank({address}): got {(place, raw, total)}, want {tuple(want)}")
+    return problems
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Load-test the webhook bot against local stubs.")
+    parser.add_argument("--rate", type=float, default=100, help="updates per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of sending")
+    parser.add_argument("--updates", help="JSONL of recorded updates to replay (default: synthetic)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="synthetic command weights")
+    parser.add_argument("--chats", type=int, default=500, help="distinct synthetic chats")
+    parser.add_argument("--latency", default=DEFAULT_LATENCY, help="stub latency in ms per upstream")
+    parser.add_argument("--jitter", type=float, default=0.25, help="± fraction applied to stub latency")
+    parser.add_argument("--drain", type=float, default=30, help="max seconds to wait for replies")
+    parser.add_argument("--label", default="default", help="name runs with comparable settings")
+    parser.add_argument("--results", default=BENCH_RESULTS)
+    parser.add_argument("--compare", action="store_true", help="exit 1 on regression vs last run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--holders", action="store_true", help="enable the holder index against the RPC stub")
+    parser.add_argument("--check-holders", action="store_true", help="only check holders.py against the recorded logs")
+    args = parser.parse_args()
+    args.count = int(args.rate * args.duration)
+    random.seed(args.seed)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    stubs = Stubs(parse_weights(args.latency), args.jitter)
+    stubs.start()
+    if args.check_holders:
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        try:
+            problems = asyncio.run(check_holders(stubs))
+        finally:
+            stubs.stop()
+        for p in problems:
+            print(f"HOLDERS MISMATCH: {p}")
+        if problems:
+            sys.exit(1)
+        print("Holder index matches the recorded logs")
+        return
+    db_dir = tempfile.mkdtemp(prefix="tiffy-bench-")
+    # main.py reads its configuration at import time.
+    os.environ.update({
+        "BOT_TOKEN": BOT_TOKEN,
+        "TELEGRAM_API_URL": f"{stubs.base}/bot",
+        "RENDER_EXTERNAL_URL": "http://bench",
+        "PRICE_API_URL": f"{stubs.base}/price.json",
+        "BSCSCAN_API_URL": f"{stubs.base}/bscscan",
+        "BSC_RPC_URL": f"{stubs.base}/rpc",
+        "OPENAI_BASE_URL": f"{stubs.base}/ai/v1",
+        "BOT_DB_PATH": os.path.join(db_dir, "bench.db"),
+        "PRICE_HISTORY_FILE": "",
+    })
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("LOG_SAMPLE_RATE", "0")
+    os.environ.setdefault("THROTTLE_LIMITS", "*=1000000/1")
+    if args.holders:
+        os.environ["HOLDERS_START_BLOCK"] = str(stubs.holder_logs["start_block"])
+    try:
+        result = asyncio.run(run(args, stubs))
+    finally:
+        stubs.stop()
+
+    record = {
+        "label": args.label,
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "config": {k: getattr(args, k) for k in ("rate", "duration", "updates", "mix", "chats", "latency", "jitter", "seed")},
+        "result": result,
+    }
+    print(json.dumps(record, indent=2))
+
+    previous = None
+    if os.path.exists(args.results):
+        with open(args.results) as f:
+            for line in f:
+                if line.strip():
+                    r = json.loads(line)
+                    if r.get("label") == args.label:
+                        previous = r
+    if not args.no_save:
+        with open(args.results, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    if args.compare and previous is not None:
+        if previous["config"] != record["config"]:
+            print(f"Note: settings differ from the previous '{args.label}' run; use --label to separate them")
+        problems = compare(result, previous["result"], args.tolerance)
+        for p in problems:
+            print(f"REGRESSION vs {previous['commit']} ({previous['at']}): {p}")
+        if problems:
+            sys.exit(1)
+        print(f"No regression vs {previous['commit']} ({previous['at']})")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,156 @@
+import os
+import time
+import asyncio
+import bisect
+from collections import deque
+
+# --- Circuit breakers for upstream dependencies ---
+# One Breaker per dependency (price.json, BscScan, BSC RPC, AI backend).
+#   closed    – calls go through; BREAKER_FAILURES consecutive failures open it
+#   open      – calls fail immediately with CircuitOpen for BREAKER_RESET_SECONDS
+#   half_open – a single probe call is let through; success closes, failure reopens
+# Every call's latency is recorded in a fixed-bucket histogram plus a short
+# window used for p95. Idempotent calls can be hedged: if the first attempt is
+# still running after the observed p95, a second one is started and whichever
+# succeeds first wins.
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.05
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class Breaker:
+    def __init__(self, name, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.max_failures = failures
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=200)
+        self.seconds_total = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.short_circuited = 0
+        self.hedged = 0
+
+    # --- state ---
+
+    def _admit(self):
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_after:
+                self.short_circuited += 1
+                raise CircuitOpen(f"{self.name} unavailable")
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                self.short_circuited += 1
+                raise CircuitOpen(f"{self.name} unavailable")
+            self._probing = True
+
+    def _success(self):
+        self._probing = False
+        self.failures = 0
+        self.state = "closed"
+
+    def _failure(self):
+        self._probing = False
+        self.errors += 1
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.max_failures:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    # --- latency ---
+
+    def _observe(self, seconds):
+        ms = seconds * 1000
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.recent.append(seconds)
+        self.seconds_total += seconds
+
+    def p95(self):
+        if len(self.recent) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    # --- calls ---
+
+    async def call(self, fn, *args, hedge=False, **kwargs):
+        self._admit()
+        self.calls += 1
+        started = time.monotonic()
+        try:
+            if hedge and self.p95() is not None:
+                result = await self._hedged(fn, args, kwargs)
+            else:
+                result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            self._probing = False
+            raise
+        except Exception:
+            self._observe(time.monotonic() - started)
+            self._failure()
+            raise
+        self._observe(time.monotonic() - started)
+        self._success()
+        return result
+
+    async def _hedged(self, fn, args, kwargs):
+        first = asyncio.ensure_future(fn(*args, **kwargs))
+        pending = {first}
+        error = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=max(self.p95(), HEDGE_MIN_DELAY))
+            if done:
+                return first.result()
+            self.hedged += 1
+            pending.add(asyncio.ensure_future(fn(*args, **kwargs)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self):
+        p95 = self.p95()
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "errors": self.errors,
+            "short_circuited": self.short_circuited,
+            "hedged": self.hedged,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "latency_ms": dict(
+                zip([str(b) for b in LATENCY_BUCKETS_MS] + ["+Inf"], self.buckets)
+            ),
+        }
+
+
+breakers = {}
+
+
+def get(name):
+    b = breakers.get(name)
+    if b is None:
+        b = breakers[name] = Breaker(name)
+    return b
+
+
+def stats():
+    return {name: b.stats() for name, b in breakers.items()}
@@ -0,0 +1,252 @@
+import os
+import time
+import asyncio
+import logging
+from telegram.error import BadRequest, Forbidden, RetryAfter
+import store
+
+# --- Broadcasts to all subscribers ---
+# Subscribers are collected from /start into SQLite. A broadcast job walks
+# them in chat_id order, batch by batch, and saves its cursor after every
+# batch so a restart resumes where it stopped. Sends go through a
+# scheduler that keeps to Telegram's limits:
+#   - BROADCAST_RATE messages/s overall (Telegram allows ~30)
+#   - at most one message per chat per second
+#   - on RetryAfter, every sender pauses for the requested time
+#
+# With several web workers only the leader sends: other workers just insert
+# the job, and the leader's watch() loop picks up 'running' jobs it is not
+# already sending. A worker taking over the lease therefore never races a
+# live sender for the same job.
+
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+BROADCAST_BATCH = int(os.getenv("BROADCAST_BATCH", "200"))
+BROADCAST_POLL_SECONDS = float(os.getenv("BROADCAST_POLL_SECONDS", "5"))
+# A text Telegram cannot parse fails for every chat; give up after this many.
+BROADCAST_MAX_PARSE_ERRORS = int(os.getenv("BROADCAST_MAX_PARSE_ERRORS", "3"))
+ADMIN_IDS = {int(x) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip()}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscribers (
+    chat_id INTEGER PRIMARY KEY,
+    joined_at REAL NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS broadcasts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text TEXT NOT NULL,
+    parse_mode TEXT,
+    created_at REAL NOT NULL,
+    cursor INTEGER NOT NULL DEFAULT 0,
+    sent INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    blocked INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'running'
+);
+"""
+store.register_schema(SCHEMA)
+
+
+class SendScheduler:
+    """Token bucket for the global rate plus a per-chat spacing."""
+
+    def __init__(self, rate=BROADCAST_RATE, per_chat_interval=1.0):
+        self.rate = rate
+        self.level = rate
+        self.stamp = time.monotonic()
+        self.per_chat_interval = per_chat_interval
+        self.last_sent = {}
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def wait(self, chat_id):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.level = min(self.rate, self.level + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.level < 1:
+                    await asyncio.sleep((1 - self.level) / self.rate)
+                    continue
+                self.level -= 1
+                break
+        last = self.last_sent.get(chat_id)
+        if last is not None and now - last < self.per_chat_interval:
+            await asyncio.sleep(self.per_chat_interval - (now - last))
+        self.last_sent[chat_id] = time.monotonic()
+        if len(self.last_sent) > 10000:
+            cutoff = time.monotonic() - self.per_chat_interval
+            self.last_sent = {k: v for k, v in self.last_sent.items() if v > cutoff}
+
+
+class Broadcaster:
+    def __init__(self, bot, db=None, scheduler=None, batch=BROADCAST_BATCH):
+        self.bot = bot
+        self.db = db or store.connection()
+        self.scheduler = scheduler or SendScheduler()
+        self.batch = batch
+        self.tasks = {}
+        self.metrics = {}
+        self._watcher = None
+
+    # --- subscribers ---
+
+    def subscribe(self, chat_id):
+        self.db.execute(
+            "INSERT INTO subscribers (chat_id, joined_at) VALUES (?, ?) "
+            "ON CONFLICT(chat_id) DO UPDATE SET active = 1",
+            (chat_id, time.time()),
+        )
+
+    def unsubscribe(self, chat_id):
+        self.db.execute("UPDATE subscribers SET active = 0 WHERE chat_id = ?", (chat_id,))
+
+    def subscriber_count(self):
+        return self.db.execute("SELECT COUNT(*) FROM subscribers WHERE active = 1").fetchone()[0]
+
+    # --- jobs ---
+
+    def create(self, text, parse_mode=None, run=True):
+        """Insert a job; run=False leaves it for the sending worker's watch()."""
+        cur = self.db.execute(
+            "INSERT INTO broadcasts (text, parse_mode, created_at) VALUES (?, ?, ?)",
+            (text, parse_mode, time.time()),
+        )
+        job_id = cur.lastrowid
+        if run:
+            self._spawn(job_id)
+        return job_id
+
+    def resume_all(self):
+        for (job_id,) in self.db.execute("SELECT id FROM broadcasts WHERE status = 'running'").fetchall():
+            # A task that died (e.g. bot.db busy) is restarted from its cursor.
+            if job_id not in self.tasks or self.tasks[job_id].done():
+                logging.info("📣 Resuming broadcast #%s", job_id)
+                self._spawn(job_id)
+
+    async def _watch(self, interval):
+        while True:
+            self.resume_all()
+            await asyncio.sleep(interval)
+
+    def watch(self, interval=BROADCAST_POLL_SECONDS):
+        """Resume running jobs now, then keep picking up ones other workers queue."""
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch(interval))
+
+    def _spawn(self, job_id):
+        if job_id not in self.tasks or self.tasks[job_id].done():
+            self.tasks[job_id] = asyncio.create_task(self._run(job_id))
+
+    async def stop(self):
+        # Jobs stay 'running' in the database and resume on next start.
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        self.tasks.clear()
+
+    async def _send(self, chat_id, text, parse_mode, m):
+        while True:
+            if m["parse_errors"] >= BROADCAST_MAX_PARSE_ERRORS:
+                return
+            await self.scheduler.wait(chat_id)
+            try:
+                await self.bot.send_message(chat_id, text, parse_mode=parse_mode)
+                m["sent"] += 1
+                return
+            except RetryAfter as e:
+                m["retry_after"] += 1
+                self.scheduler.pause(float(e.retry_after))
+            except Forbidden:
+                m["blocked"] += 1
+                self.unsubscribe(chat_id)
+                return
+            except BadRequest as e:
+                if "chat not found" in str(e).lower():
+                    m["blocked"] += 1
+                    self.unsubscribe(chat_id)
+                else:
+                    m["failed"] += 1
+                    if "can't parse entities" in str(e).lower():
+                        m["parse_errors"] += 1
+                    logging.error("Broadcast send to %s rejected: %s", chat_id, e)
+                return
+            except Exception as e:
+                m["failed"] += 1
+                logging.error("Broadcast send to %s failed: %s", chat_id, e)
+                return
+
+    async def _run(self, job_id):
+        text, parse_mode, cursor, sent, failed, blocked = self.db.execute(
+            "SELECT text, parse_mode, cursor, sent, failed, blocked FROM broadcasts WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        total = self.subscriber_count()
+        m = self.metrics[job_id] = {
+            "sent": sent, "failed": failed, "blocked": blocked, "retry_after": 0, "parse_errors": 0,
+            "started": time.monotonic(), "sent_at_start": sent + failed + blocked, "total": total,
+        }
+        while True:
+            rows = self.db.execute(
+                "SELECT chat_id FROM subscribers WHERE active = 1 AND chat_id > ? "
+                "ORDER BY chat_id LIMIT ?",
+                (cursor, self.batch),
+            ).fetchall()
+            if not rows:
+                break
+            await asyncio.gather(*(self._send(chat_id, text, parse_mode, m) for (chat_id,) in rows))
+            cursor = rows[-1][0]
+            self.db.execute(
+                "UPDATE broadcasts SET cursor = ?, sent = ?, failed = ?, blocked = ? WHERE id = ?",
+                (cursor, m["sent"], m["failed"], m["blocked"], job_id),
+            )
+            if m["parse_errors"] >= BROADCAST_MAX_PARSE_ERRORS:
+                self.db.execute("UPDATE broadcasts SET status = 'failed' WHERE id = ?", (job_id,))
+                logging.error("📣 Broadcast #%s stopped: Telegram cannot parse its text", job_id)
+                return
+        self.db.execute("UPDATE broadcasts SET status = 'done' WHERE id = ?", (job_id,))
+        logging.info("📣 Broadcast #%s done: %s", job_id, self.status(job_id))
+
+    def status(self, job_id):
+        m = self.metrics.get(job_id)
+        if m is None:
+            return None
+        done = m["sent"] + m["failed"] + m["blocked"]
+        elapsed = time.monotonic() - m["started"]
+        rate = (done - m["sent_at_start"]) / elapsed if elapsed > 0 else 0.0
+        return {
+            "id": job_id,
+            "sent": m["sent"],
+            "failed": m["failed"],
+            "blocked": m["blocked"],
+            "retry_after": m["retry_after"],
+            "total": m["total"],
+            "msgs_per_sec": round(rate, 1),
+            "eta_seconds": round((m["total"] - done) / rate) if rate > 0 and m["total"] > done else 0,
+            "running": job_id in self.tasks and not self.tasks[job_id].done(),
+            "parse_errors": m["parse_errors"],
+        }
+
+
+def format_status(status):
+    """One-line summary of Broadcaster.status() for the admin."""
+    if status["parse_errors"] >= BROADCAST_MAX_PARSE_ERRORS:
+        state = "stopped (text rejected by Telegram)"
+    elif status["running"]:
+        state = f"running, {status['msgs_per_sec']} msg/s, ~{status['eta_seconds']}s left"
+    else:
+        state = "done"
+    return (
+        f"Broadcast #{status['id']} {state}: {status['sent']}/{status['total']} sent, "
+        f"{status['failed']} failed, {status['blocked']} blocked"
+    )
@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import gzip
+import hashlib
+import logging
+from io import BytesIO
+
+# --- Static asset build ---
+# Turns the site files at the repo root into an optimized set for
+# static_assets.py to serve:
+#   - loading*.jpg backgrounds resized to LOADING_WIDTH, as AVIF, WebP and a
+#     progressive JPEG fallback
+#   - TiffyAI-Token.png as the 192/512 icons manifest.json declares, plus
+#     WebP/AVIF of the 512 size
+#   - index.html / manifest.json / tokenlist.json precompressed (gzip, and
+#     brotli when the module is installed)
+# Every output file also gets a content-hashed URL under /assets/ that can be
+# cached forever, and each negotiated image one more /assets/ URL hashed over
+# all its variants. index.html's background list and manifest.json's icons
+# are rewritten to those URLs. assets.json maps each URL to its variants with
+# a precomputed ETag.
+#
+#   python build_assets.py [site_dir] [out_dir]
+#
+# Pillow is needed for the image variants (AVIF needs a Pillow built with
+# libavif or the pillow-avif-plugin); without it images are copied as-is.
+
+SITE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+STATIC_DIR = os.getenv("STATIC_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "dist"))
+LOADING_WIDTH = int(os.getenv("LOADING_WIDTH", "1280"))
+ICON_SIZES = (192, 512)
+TEXT_FILES = {
+    "index.html": "text/html; charset=utf-8",
+    "manifest.json": "application/manifest+json",
+    "tokenlist.json": "application/json",
+}
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+NEGOTIATED = "public, max-age=86400"
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _avif_supported():
+    if Image is None:
+        return False
+    try:
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        pass
+    Image.init()
+    return "AVIF" in Image.SAVE
+
+
+def _encode(image, fmt, **options):
+    buf = BytesIO()
+    image.save(buf, fmt, **options)
+    return buf.getvalue()
+
+
+class Build:
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.routes = {}
+
+    def emit(self, stem, ext, data, media_type, encoding=None, accept=None):
+        """Write one variant and register its hashed /assets/ URL."""
+        digest = hashlib.sha256(data).hexdigest()
+        name = f"{stem}.{digest[:10]}.{ext}"
+        with open(os.path.join(self.out_dir, name), "wb") as f:
+            f.write(data)
+        variant = {
+            "file": name,
+            "type": media_type,
+            "encoding": encoding,
+            "accept": accept,
+            "etag": f'"{digest[:20]}"',
+            "size": len(data),
+        }
+        if encoding is None:
+            self.routes[f"/assets/{name}"] = {"cache": IMMUTABLE, "variants": [variant]}
+        return variant
+
+    def route(self, path, cache, variants):
+        self.routes[path] = {"cache": cache, "variants": variants}
+
+    def text(self, path, stem, ext, data, media_type, cache=REVALIDATE):
+        variants = []
+        if brotli is not None:
+            variants.append(self.emit(stem, ext + ".br", brotli.compress(data, quality=11), media_type, "br"))
+        variants.append(self.emit(stem, ext + ".gz", gzip.compress(data, 9, mtime=0), media_type, "gzip"))
+        plain = self.emit(stem, ext, data, media_type)
+        variants.append(plain)
+        self.route(path, cache, variants)
+        return plain
+
+    def image(self, path, stem, image, fallback, width=None, cache=NEGOTIATED):
+        """Register AVIF/WebP/fallback variants of image under path.
+
+        Returns an immutable /assets/ URL serving the same negotiated variants.
+        """
+        if width and image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        variants = []
+        if _avif_supported():
+            variants.append(self.emit(stem, "avif", _encode(image, "AVIF", quality=50), "image/avif", accept="image/avif"))
+        variants.append(self.emit(stem, "webp", _encode(image, "WEBP", quality=75, method=6), "image/webp", accept="image/webp"))
+        if fallback == "jpg":
+            data = _encode(image.convert("RGB"), "JPEG", quality=80, optimize=True, progressive=True)
+            variants.append(self.emit(stem, "jpg", data, "image/jpeg"))
+        else:
+            variants.append(self.emit(stem, "png", _encode(image, "PNG", optimize=True), "image/png"))
+        self.route(path, cache, variants)
+        digest = hashlib.sha256("".join(v["etag"] for v in variants).encode()).hexdigest()
+        url = f"/assets/{stem}.{digest[:10]}.{fallback}"
+        self.route(url, IMMUTABLE, variants)
+        return url
+
+    def raw(self, path, stem, ext, data, media_type, cache=NEGOTIATED):
+        variant = self.emit(stem, ext, data, media_type)
+        self.route(path, cache, [variant])
+        return variant
+
+
+def build(site_dir=SITE_DIR, out_dir=STATIC_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    for name in os.listdir(out_dir):
+        os.remove(os.path.join(out_dir, name))
+    b = Build(out_dir)
+
+    def read(name):
+        with open(os.path.join(site_dir, name), "rb") as f:
+            return f.read()
+
+    loading = sorted(n for n in os.listdir(site_dir) if n.startswith("loading") and n.endswith(".jpg"))
+    icons = {}
+    hashed = {}  # loading*.jpg -> immutable URL, for index.html
+    if Image is not None:
+        for name in loading:
+            with Image.open(os.path.join(site_dir, name)) as im:
+                hashed[name] = b.image(f"/{name}", name[:-4], im, "jpg", width=LOADING_WIDTH)
+        with Image.open(os.path.join(site_dir, "TiffyAI-Token.png")) as im:
+            im = im.convert("RGBA")
+            for size in ICON_SIZES:
+                icon = im.resize((size, size), Image.LANCZOS)
+                data = _encode(icon, "PNG", optimize=True)
+                icons[size] = b.raw(f"/icons/icon-{size}.png", f"icon-{size}", "png", data, "image/png")
+            b.image("/TiffyAI-Token.png", "TiffyAI-Token", im, "png", width=max(ICON_SIZES))
+    else:
+        logging.warning("Pillow not installed: images copied without resizing")
+        for name in loading:
+            hashed[name] = "/assets/" + b.raw(f"/{name}", name[:-4], "jpg", read(name), "image/jpeg")["file"]
+        b.raw("/TiffyAI-Token.png", "TiffyAI-Token", "png", read("TiffyAI-Token.png"), "image/png")
+    b.raw("/favicon.ico", "favicon", "ico", read("favicon.ico"), "image/x-icon")
+
+    for name, media_type in TEXT_FILES.items():
+        data = read(name)
+        if name == "manifest.json" and icons:
+            manifest = json.loads(data)
+            for icon in manifest.get("icons", []):
+                size = int(icon["sizes"].split("x")[0])
+                if size in icons:
+                    icon["src"] = f"/assets/{icons[size]['file']}"
+            data = json.dumps(manifest, indent=2).encode()
+        if name == "index.html":
+            html = data.decode()
+            for image, url in hashed.items():
+                html = html.replace(f"'{image}'", f"'{url}'")
+            data = html.encode()
+        stem, ext = name.rsplit(".", 1)
+        b.text(f"/{name}", stem, ext, data, media_type)
+    b.routes["/"] = b.routes["/index.html"]
+
+    with open(os.path.join(out_dir, "assets.json"), "w") as f:
+        json.dump(b.routes, f, indent=1)
+    before = sum(os.path.getsize(os.path.join(site_dir, n)) for n in loading + ["TiffyAI-Token.png"])
+    after = sum(b.routes[f"/{n}"]["variants"][0]["size"] for n in loading + ["TiffyAI-Token.png"])
+    logging.info("📦 %d routes built into %s (images %d KB -> %d KB best variant)",
+                 len(b.routes), out_dir, before // 1024, after // 1024)
+    return b.routes
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build(*sys.argv[1:3])
@@ -0,0 +1,162 @@
+import re
+from telegram import BotCommand, InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import BaseHandler, CommandHandler
+
+# --- Declarative command table ---
+# Each bot command is declared once with its /help description. Static
+# replies are rendered and validated when the table is built (at import), so
+# answering them is a dict lookup plus one send. /help and the Telegram
+# command menu (set_my_commands) are generated from the same table.
+
+_COMMAND_NAME = re.compile(r"^[a-z0-9_]{1,32}$")
+
+
+class Command:
+    def __init__(self, name, description, handler=None, text=None,
+                 parse_mode="Markdown", preview=True, buttons=None, menu=True):
+        self.name = name
+        self.description = description
+        self.handler = handler
+        self.text = text
+        self.parse_mode = parse_mode
+        self.preview = preview
+        self.buttons = buttons or []
+        self.menu = menu
+        self.reply = None  # pre-rendered reply_text kwargs for static commands
+
+
+def static(name, description, text, **options):
+    return Command(name, description, text=text, **options)
+
+
+def dynamic(name, description, handler, **options):
+    return Command(name, description, handler=handler, **options)
+
+
+def check_markdown(text):
+    """Raise ValueError if legacy Markdown entities in text are unbalanced."""
+    open_entity = None
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if open_entity is None:
+            if text.startswith("```", i):
+                end = text.find("```", i + 3)
+                if end < 0:
+                    raise ValueError("unclosed ``` block")
+                i = end + 3
+                continue
+            if c in "*_`":
+                open_entity = (c, i)
+            elif c == "[":
+                close = text.find("](", i)
+                end = text.find(")", close + 2) if close >= 0 else -1
+                if close < 0 or end < 0:
+                    raise ValueError(f"malformed link at {i}")
+                i = end + 1
+                continue
+        elif c == open_entity[0]:
+            open_entity = None
+        i += 1
+    if open_entity is not None:
+        raise ValueError(f"unclosed {open_entity[0]!r} at {open_entity[1]}")
+
+
+def render(cmd):
+    if cmd.parse_mode == "Markdown":
+        try:
+            check_markdown(cmd.text)
+        except ValueError as e:
+            raise ValueError(f"/{cmd.name}: {e}") from None
+    reply = {"text": cmd.text, "parse_mode": cmd.parse_mode}
+    if not cmd.preview:
+        reply["disable_web_page_preview"] = True
+    if cmd.buttons:
+        for label, url in cmd.buttons:
+            if not url.startswith(("https://", "http://", "tg://")):
+                raise ValueError(f"/{cmd.name}: bad button url {url!r}")
+        reply["reply_markup"] = InlineKeyboardMarkup(
+            [[InlineKeyboardButton(label, url=url)] for label, url in cmd.buttons]
+        )
+    return reply
+
+
+def help_text(commands, title="🛠️ *Bot Help Guide:*"):
+    lines = [f"`/{c.name}` – {c.description}" for c in commands if c.menu]
+    return title + "\n\n" + "\n".join(lines)
+
+
+def help_command(commands, name="help", description="This guide"):
+    """A static /help listing every menu command, itself included."""
+    cmd = Command(name, description)
+    cmd.text = help_text(commands + [cmd])
+    return cmd
+
+
+def bot_commands(commands):
+    return [BotCommand(c.name, c.description) for c in commands if c.menu]
+
+
+def _sender(reply):
+    async def send(update, context):
+        await update.message.reply_text(**reply)
+    return send
+
+
+class StaticCommandHandler(BaseHandler):
+    """One handler for every static command: a dict lookup instead of a
+    CommandHandler per command, replying with the pre-rendered kwargs."""
+
+    def __init__(self, replies, wrap=None):
+        super().__init__(self._noop)
+        self.replies = {}
+        for name, reply in replies.items():
+            send = _sender(reply)
+            self.replies[name] = wrap(name, send) if wrap else send
+
+    async def _noop(self, update, context):
+        pass
+
+    def check_update(self, update):
+        if not isinstance(update, Update):
+            return None
+        message = update.message
+        if message is None or not message.text or not message.text.startswith("/"):
+            return None
+        parts = message.text[1:].split(maxsplit=1)
+        if not parts:
+            return None
+        name, _, target = parts[0].partition("@")
+        if target and target.lower() != (update.get_bot().username or "").lower():
+            return None
+        return self.replies.get(name.lower())
+
+    async def handle_update(self, update, application, check_result, context):
+        await check_result(update, context)
+
+
+def build(commands, wrap=None):
+    """Validate the table and return the handlers to register.
+
+    wrap(name, callback), if given, wraps every reply callback (e.g. for
+    timing).
+    """
+    seen = set()
+    replies = {}
+    handlers = []
+    for cmd in commands:
+        if not _COMMAND_NAME.match(cmd.name) or cmd.name in seen:
+            raise ValueError(f"bad or duplicate command name: {cmd.name!r}")
+        if not 1 <= len(cmd.description) <= 256:
+            raise ValueError(f"/{cmd.name}: description must be 1-256 chars")
+        if (cmd.handler is None) == (cmd.text is None):
+            raise ValueError(f"/{cmd.name}: needs exactly one of handler or text")
+        seen.add(cmd.name)
+        if cmd.handler is None:
+            cmd.reply = replies[cmd.name] = render(cmd)
+        else:
+            handlers.append(CommandHandler(cmd.name, wrap(cmd.name, cmd.handler) if wrap else cmd.handler))
+    return [StaticCommandHandler(replies, wrap)] + handlers
@@ -0,0 +1,92 @@
+import os
+import logging
+
+# --- Update de-duplication ---
+# Telegram redelivers a webhook POST it thinks failed. update_id only grows,
+# so a bitmap of the last DEDUP_WINDOW ids behind the highest one seen is
+# enough to recognise replays in O(1) with fixed memory. An id below the
+# window is not a replay but a sequence reset (Telegram picks a new random
+# start after a week without updates, or the restored state is stale): the
+# window restarts at that id.
+
+DEDUP_WINDOW = int(os.getenv("DEDUP_WINDOW", "65536"))
+DEDUP_STATE_FILE = os.getenv("DEDUP_STATE_FILE")
+
+
+class UpdateDeduper:
+    def __init__(self, window=DEDUP_WINDOW, path=DEDUP_STATE_FILE):
+        self.window = window
+        self.path = path
+        self.bits = bytearray((window + 7) // 8)
+        self.high = None
+        self.dropped = 0
+
+    def _bit(self, update_id):
+        slot = update_id % self.window
+        return slot >> 3, 1 << (slot & 7)
+
+    def seen(self, update_id):
+        if update_id is None or self.high is None:
+            return False
+        if update_id > self.high or update_id <= self.high - self.window:
+            return False
+        byte, mask = self._bit(update_id)
+        return bool(self.bits[byte] & mask)
+
+    def mark(self, update_id):
+        if update_id is None:
+            return
+        if self.high is None:
+            self.high = update_id
+        elif update_id > self.high:
+            gap = update_id - self.high
+            if gap >= self.window:
+                self.bits = bytearray(len(self.bits))
+            else:
+                # Slots the window slides over now belong to new ids.
+                for uid in range(self.high + 1, update_id):
+                    byte, mask = self._bit(uid)
+                    self.bits[byte] &= ~mask
+            self.high = update_id
+        elif update_id <= self.high - self.window:
+            logging.warning("🔁 update_id reset from %s to %s", self.high, update_id)
+            self.bits = bytearray(len(self.bits))
+            self.high = update_id
+        byte, mask = self._bit(update_id)
+        self.bits[byte] |= mask
+
+    def check(self, update_id):
+        """Return True for a replay (and count it), False for a new update."""
+        if self.seen(update_id):
+            self.dropped += 1
+            return True
+        return False
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                header = f.readline()
+                window, high = (int(x) for x in header.split())
+                bits = f.read()
+            if window == self.window and len(bits) == len(self.bits):
+                self.high, self.bits = high, bytearray(bits)
+            else:
+                # Window size changed: keep only the high-water mark.
+                self.high = high
+            logging.info("♻️ Dedup window restored at update_id %s", self.high)
+        except Exception as e:
+            logging.error("Dedup state load error: %s", e)
+
+    def save(self):
+        if not self.path or self.high is None:
+            return
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(f"{self.window} {self.high}\n".encode())
+                f.write(self.bits)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logging.error("Dedup state save error: %s", e)
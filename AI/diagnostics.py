@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import functools
+import threading
+import traceback
+from collections import Counter
+
+# --- Event-loop diagnostics ---
+# Blocking-call detector: a heartbeat task on the loop stamps the time every
+# few milliseconds, and a watchdog thread checks the stamp. If the loop has not
+# come back for BLOCKING_THRESHOLD_MS, the watchdog samples the loop thread's
+# stack with sys._current_frames(). That catches the blocking frame
+# (requests.get, a sync SDK call, ...) while it is still running. It also
+# notes which command the running task belongs to. When the loop resumes, the
+# heartbeat logs one warning with the total stall time, the command and the
+# stack.
+#
+# Sampling profiler: profile() samples every thread's stack at a fixed
+# interval for a bounded time and returns collapsed stacks
+# ("frame;frame;frame count" per line), the input format of flamegraph.pl
+# and speedscope.
+
+BLOCKING_THRESHOLD_MS = float(os.getenv("BLOCKING_THRESHOLD_MS", "100"))
+HEARTBEAT_MS = float(os.getenv("HEARTBEAT_MS", "20"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# task -> command name, for tasks currently inside a command handler
+_task_commands = {}
+
+
+def tagged(name, callback):
+    """Wrap a PTB handler callback so stalls and samples name its command."""
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        task = asyncio.current_task()
+        _task_commands[task] = name
+        try:
+            return await callback(update, context)
+        finally:
+            _task_commands.pop(task, None)
+    return wrapper
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame):
+    """Frames root first."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _current_command(loop):
+    # Read from another thread: a dict lookup, safe under the GIL.
+    task = getattr(asyncio.tasks, "_current_tasks", {}).get(loop)
+    return _task_commands.get(task) if task is not None else None
+
+
+class BlockingDetector:
+    def __init__(self, threshold=BLOCKING_THRESHOLD_MS / 1000, heartbeat=HEARTBEAT_MS / 1000):
+        self.threshold = threshold
+        self.heartbeat = heartbeat
+        self.beat = 0.0
+        self.stalls = Counter()  # command (or "-") -> count
+        self._sample = None
+        self._loop = None
+        self._loop_thread = None
+        self._task = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    async def _heartbeat(self):
+        while True:
+            self.beat = time.perf_counter()
+            await asyncio.sleep(self.heartbeat)
+            sample = self._sample
+            if sample is not None:
+                self._sample = None
+                started, command, stack = sample
+                stalled = time.perf_counter() - started
+                self.stalls[command or "-"] += 1
+                logging.warning(
+                    "🐌 Event loop blocked for %.0f ms (command: %s)\n%s",
+                    stalled * 1000, command or "-", "".join(stack),
+                )
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            beat = self.beat
+            if self._sample is not None or not beat:
+                continue
+            # The heartbeat sleeps for `heartbeat`; anything beyond that is stall.
+            if time.perf_counter() - beat - self.heartbeat < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None or self.beat != beat:
+                continue
+            self._sample = (beat + self.heartbeat, _current_command(self._loop), traceback.format_stack(frame))
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="blocking-detector", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        self._thread.join(1)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+def profile(seconds, interval=0.005, loop=None, loop_thread=None):
+    """Sample all threads for `seconds`; return collapsed stacks as text.
+
+    Call from a worker thread (asyncio.to_thread), never on the loop itself.
+    Samples from the loop thread are rooted at the running command, if any.
+    """
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    counts = Counter()
+    deadline = time.perf_counter() + min(seconds, PROFILE_MAX_SECONDS)
+    while time.perf_counter() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            root = names.get(ident, f"thread-{ident}")
+            if ident == loop_thread and loop is not None:
+                command = _current_command(loop)
+                if command:
+                    root = f"{root};/{command}"
+            counts[root + ";" + ";".join(_frame_label(f) for f in _stack(frame))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
@@ -0,0 +1,269 @@
+import os
+import time
+import asyncio
+import logging
+import rpc
+import store
+
+# --- Holder index from Transfer logs ---
+# Replays ERC-20 Transfer events for the token from HOLDERS_START_BLOCK
+# onward, over JSON-RPC eth_getLogs, and keeps every balance locally.
+# Addresses get small integer ids; balances live in a list indexed by id.
+# After each ingest the ranking (ids by balance) and id -> rank map are
+# rebuilt once, so top-N and "what is my rank?" are plain lookups.
+# The cursor and balances are saved to bot.db so a restart picks up at the
+# last processed block. The index stays HOLDERS_CONFIRMATIONS blocks behind
+# head to avoid reorgs. Set HOLDERS_START_BLOCK (the token's deploy block) to
+# enable it.
+#
+# With several web workers only the leader syncs. The others follow(): they
+# poll the saved cursor and reload the balances from bot.db when it moves, so
+# /rank and /leaderboard answer the same on every worker.
+
+HOLDERS_START_BLOCK = os.getenv("HOLDERS_START_BLOCK")
+HOLDERS_BLOCK_CHUNK = int(os.getenv("HOLDERS_BLOCK_CHUNK", "2000"))
+HOLDERS_CONFIRMATIONS = int(os.getenv("HOLDERS_CONFIRMATIONS", "3"))
+HOLDERS_POLL_SECONDS = float(os.getenv("HOLDERS_POLL_SECONDS", "15"))
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ZERO_ADDRESS = "0x" + "0" * 40
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS holder_balances (
+    address TEXT PRIMARY KEY,
+    balance TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS holder_cursor (
+    contract TEXT PRIMARY KEY,
+    next_block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS holder_synced (
+    contract TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+"""
+store.register_schema(SCHEMA)
+
+
+def _topic_address(topic):
+    return "0x" + topic[-40:].lower()
+
+
+class HolderIndex:
+    def __init__(self, contract, start_block=0, rpc_url=rpc.BSC_RPC_URL, db=None):
+        self.contract = contract.lower()
+        self.rpc_url = rpc_url
+        self.next_block = start_block
+        self.db = db
+        self.ids = {}        # address -> id
+        self.addresses = []  # id -> address
+        self.balances = []   # id -> raw balance (int)
+        self.ranking = []    # ids with a positive balance, largest first
+        self.rank_of = {}    # id -> 1-based rank
+        self.synced_at = None
+        self._changed = set()
+        self._task = None
+        self.following = False
+
+    # --- balances ---
+
+    def _id(self, address):
+        i = self.ids.get(address)
+        if i is None:
+            i = self.ids[address] = len(self.addresses)
+            self.addresses.append(address)
+            self.balances.append(0)
+        return i
+
+    def ingest(self, logs, rerank=True):
+        """Apply Transfer logs (eth_getLogs result objects) in order."""
+        for log in logs:
+            topics = log["topics"]
+            if len(topics) < 3 or topics[0].lower() != TRANSFER_TOPIC:
+                continue
+            value = int(log["data"], 16) if log["data"] not in ("0x", "") else 0
+            src, dst = _topic_address(topics[1]), _topic_address(topics[2])
+            if src != ZERO_ADDRESS:
+                i = self._id(src)
+                self.balances[i] -= value
+                self._changed.add(i)
+            if dst != ZERO_ADDRESS:
+                i = self._id(dst)
+                self.balances[i] += value
+                self._changed.add(i)
+        if rerank:
+            self._rerank()
+
+    def _rerank(self):
+        balances = self.balances
+        self.ranking = sorted(
+            (i for i, b in enumerate(balances) if b > 0), key=balances.__getitem__, reverse=True
+        )
+        self.rank_of = {i: r for r, i in enumerate(self.ranking, 1)}
+
+    def top(self, n):
+        return [(self.addresses[i], self.balances[i]) for i in self.ranking[:n]]
+
+    def rank(self, address):
+        """Return (rank, balance, holder_count); rank is None for non-holders."""
+        i = self.ids.get(address.lower())
+        if i is None:
+            return None, 0, len(self.ranking)
+        return self.rank_of.get(i), self.balances[i], len(self.ranking)
+
+    def stats(self):
+        return {
+            "holders": len(self.ranking),
+            "addresses": len(self.addresses),
+            "next_block": self.next_block,
+            "synced_at": self.synced_at,
+        }
+
+    # --- persistence ---
+
+    def load(self):
+        if self.db is None:
+            return
+        row = self.db.execute(
+            "SELECT next_block FROM holder_cursor WHERE contract = ?", (self.contract,)
+        ).fetchone()
+        if row is None:
+            return
+        self.next_block = row[0]
+        for address, balance in self.db.execute("SELECT address, balance FROM holder_balances"):
+            self.balances[self._id(address)] = int(balance)
+        self._rerank()
+        logging.info("📒 Holder index restored: %d holders at block %d", len(self.ranking), self.next_block)
+
+    def reload(self):
+        """Replace the in-memory index with what bot.db holds (another worker
+        syncs it). Returns False if nothing was saved yet."""
+        if self.db is None:
+            return False
+        # One read transaction, so the cursor and balances match.
+        self.db.execute("BEGIN")
+        try:
+            row = self.db.execute(
+                "SELECT next_block FROM holder_cursor WHERE contract = ?", (self.contract,)
+            ).fetchone()
+            synced = self.db.execute(
+                "SELECT synced_at FROM holder_synced WHERE contract = ?", (self.contract,)
+            ).fetchone()
+            rows = self.db.execute("SELECT address, balance FROM holder_balances").fetchall()
+        finally:
+            self.db.execute("COMMIT")
+        if row is None:
+            return False
+        self.ids, self.addresses, self.balances, self._changed = {}, [], [], set()
+        for address, balance in rows:
+            self.balances[self._id(address)] = int(balance)
+        self._rerank()
+        self.next_block = row[0]
+        self.synced_at = synced[0] if synced else None
+        return True
+
+    def save(self):
+        if self.db is None:
+            return
+        rows = [(self.addresses[i], str(self.balances[i])) for i in self._changed]
+        self._changed = set()
+        try:
+            self.db.execute("BEGIN")
+            self.db.executemany(
+                "INSERT INTO holder_balances (address, balance) VALUES (?, ?) "
+                "ON CONFLICT(address) DO UPDATE SET balance = excluded.balance",
+                rows,
+            )
+            self.db.execute(
+                "INSERT INTO holder_cursor (contract, next_block) VALUES (?, ?) "
+                "ON CONFLICT(contract) DO UPDATE SET next_block = excluded.next_block",
+                (self.contract, self.next_block),
+            )
+            self.db.execute("COMMIT")
+        except Exception:
+            # The connection is shared: never leave a transaction open on it.
+            if self.db.in_transaction:
+                self.db.execute("ROLLBACK")
+            self._changed.update(self.ids[a] for a, _ in rows)
+            raise
+
+    # --- sync ---
+
+    async def rpc(self, method, params):
+        return await rpc.call(method, params, url=self.rpc_url)
+
+    async def sync(self):
+        """Ingest every confirmed block after the cursor. Returns blocks done."""
+        head = int(await self.rpc("eth_blockNumber", []), 16) - HOLDERS_CONFIRMATIONS
+        start = self.next_block
+        while self.next_block <= head:
+            to_block = min(self.next_block + HOLDERS_BLOCK_CHUNK - 1, head)
+            logs = await self.rpc("eth_getLogs", [{
+                "address": self.contract,
+                "topics": [TRANSFER_TOPIC],
+                "fromBlock": hex(self.next_block),
+                "toBlock": hex(to_block),
+            }])
+            self.ingest(logs, rerank=False)
+            self.next_block = to_block + 1
+            self.save()
+        if self.next_block != start:
+            self._rerank()
+        self.synced_at = time.time()
+        if self.db is not None:
+            self.db.execute(
+                "INSERT INTO holder_synced (contract, synced_at) VALUES (?, ?) "
+                "ON CONFLICT(contract) DO UPDATE SET synced_at = excluded.synced_at",
+                (self.contract, self.synced_at),
+            )
+        return self.next_block - start
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logging.error("Holder index sync error: %s", e)
+            await asyncio.sleep(HOLDERS_POLL_SECONDS)
+
+    async def _follow(self):
+        while True:
+            try:
+                row = self.db.execute(
+                    "SELECT next_block FROM holder_cursor WHERE contract = ?", (self.contract,)
+                ).fetchone()
+                if row is not None and (row[0] != self.next_block or self.synced_at is None):
+                    self.reload()
+            except Exception as e:
+                logging.error("Holder index reload error: %s", e)
+            await asyncio.sleep(HOLDERS_POLL_SECONDS)
+
+    def start(self, follow=False):
+        """Sync from the node, or with follow=True track another worker's sync."""
+        if self._task is not None:
+            if self.following == follow:
+                return
+            self._task.cancel()
+        if not follow and self.following:
+            # Taking over: continue from the latest saved state.
+            self.reload()
+        self.following = follow
+        self._task = asyncio.create_task(self._follow() if follow else self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def from_env(contract):
+    """The index configured from the environment, or None when disabled."""
+    if not HOLDERS_START_BLOCK:
+        return None
+    index = HolderIndex(contract, int(HOLDERS_START_BLOCK), db=store.connection())
+    index.load()
+    return index
@@ -0,0 +1,99 @@
+import os
+import asyncio
+import logging
+import contextlib
+import httpx
+
+# --- Shared outbound HTTP client ---
+# One pooled keep-alive client for the whole process. Created in the
+# FastAPI startup hook (or PTB post_init) and closed on shutdown, so no
+# handler ever blocks the event loop on a synchronous request.
+
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "10"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+
+_client = None
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+async def start():
+    global _client
+    if _client is not None:
+        return _client
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_PER_HOST,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    _client = httpx.AsyncClient(
+        http2=_http2_available(),
+        limits=limits,
+        timeout=DEFAULT_TIMEOUT,
+    )
+    _host_slots.clear()
+    logging.info("🌐 HTTP client ready (http2=%s)", _http2_available())
+    return _client
+
+
+async def close():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def client():
+    if _client is None:
+        raise RuntimeError("HTTP client not started")
+    return _client
+
+
+# Per-host semaphores cap concurrent requests to any single upstream.
+_host_slots = {}
+
+
+def _slot(url):
+    host = httpx.URL(url).host
+    sem = _host_slots.get(host)
+    if sem is None:
+        sem = _host_slots[host] = asyncio.Semaphore(MAX_PER_HOST)
+    return sem
+
+
+async def get(url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    async with _slot(url):
+        r = await client().get(url, timeout=timeout, **kwargs)
+    r.raise_for_status()
+    return r
+
+
+async def post(url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    async with _slot(url):
+        r = await client().post(url, timeout=timeout, **kwargs)
+    r.raise_for_status()
+    return r
+
+
+async def get_json(url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    return (await get(url, timeout=timeout, **kwargs)).json()
+
+
+async def post_json(url, json, timeout=DEFAULT_TIMEOUT, **kwargs):
+    return (await post(url, json=json, timeout=timeout, **kwargs)).json()
+
+
+@contextlib.asynccontextmanager
+async def stream(method, url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    async with _slot(url):
+        async with client().stream(method, url, timeout=timeout, **kwargs) as r:
+            r.raise_for_status()
+            yield r
@@ -0,0 +1,102 @@
+from telegram import InlineQueryResultArticle, InputTextMessageContent
+
+# --- Inline mode (@TiffyAI_Bot price) ---
+# Inline queries arrive at keystroke rate, so every answer comes from a
+# prefix table built ahead of time: each query prefix ("p", "pr", "pri", ...)
+# maps straight to its result list. Static command replies are indexed once;
+# dynamic entries (price, leaderboard) are re-rendered from their caches only
+# when those caches change, never fetched per query. Telegram's cache_time is
+# set to how long the included data stays fresh. A query matching an entry
+# whose cache is empty or stale gets a short cache_time and starts a
+# background refresh, so the next keystroke or retry sees the data.
+
+STATIC_CACHE_TIME = 3600
+EMPTY_CACHE_TIME = 5
+MAX_RESULTS = 50
+
+
+class Dynamic:
+    """An inline entry rendered from an in-memory cache.
+
+    render() returns the message text, or None while there is no data yet;
+    version() changes whenever the cache refreshes; cache_time() is how many
+    seconds the current text stays valid; refresh(), if given, starts a
+    background refresh of the cache and must not block.
+    """
+
+    def __init__(self, name, description, render, version, cache_time, parse_mode="Markdown", refresh=None):
+        self.name = name
+        self.description = description
+        self.render = render
+        self.version = version
+        self.cache_time = cache_time
+        self.parse_mode = parse_mode
+        self.refresh = refresh
+
+
+def _article(name, description, reply):
+    return InlineQueryResultArticle(
+        id=name,
+        title=f"/{name}",
+        description=description,
+        input_message_content=InputTextMessageContent(
+            reply["text"],
+            parse_mode=reply.get("parse_mode"),
+            disable_web_page_preview=reply.get("disable_web_page_preview"),
+        ),
+        reply_markup=reply.get("reply_markup"),
+    )
+
+
+class InlineIndex:
+    def __init__(self, commands, dynamic=()):
+        self.static = [
+            (c.name, _article(c.name, c.description, c.reply))
+            for c in commands if c.reply is not None and c.menu
+        ]
+        self.dynamic = list(dynamic)
+        self._versions = None
+        self._empty = set()
+        self.index = {}
+
+    def _rebuild(self, versions):
+        entries = [(name, result, None) for name, result in self.static]
+        self._empty = set()
+        for d in self.dynamic:
+            text = d.render()
+            if text is None:
+                # Still indexed, so a matching query knows to retry soon.
+                self._empty.add(d)
+                entries.append((d.name, None, d))
+            else:
+                reply = {"text": text, "parse_mode": d.parse_mode}
+                entries.append((d.name, _article(d.name, d.description, reply), d))
+        index = {}
+        for name, result, source in entries:
+            for i in range(len(name) + 1):
+                index.setdefault(name[:i], []).append((result, source))
+        self.index = {
+            prefix: (
+                tuple(r for r, _ in hits if r is not None)[:MAX_RESULTS],
+                tuple(d for _, d in hits if d is not None),
+            )
+            for prefix, hits in index.items()
+        }
+        self._versions = versions
+
+    def answer(self, query):
+        """Return (results, cache_time) for the raw inline query text."""
+        versions = tuple(d.version() for d in self.dynamic)
+        if versions != self._versions:
+            self._rebuild(versions)
+        key = query.strip().lstrip("/").lower()
+        results, sources = self.index.get(key, ((), ()))
+        cache_time = STATIC_CACHE_TIME
+        for d in sources:
+            fresh_for = EMPTY_CACHE_TIME if d in self._empty else int(d.cache_time())
+            if fresh_for <= 0 or d in self._empty:
+                fresh_for = min(max(1, fresh_for), EMPTY_CACHE_TIME)
+                if d.refresh is not None:
+                    d.refresh()
+            cache_time = min(cache_time, fresh_for)
+        return results, cache_time
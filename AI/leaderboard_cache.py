@@ -0,0 +1,105 @@
+import os
+import time
+import asyncio
+import logging
+import http_client
+import breaker
+
+# --- Leaderboard cache ---
+# BscScan tokenholderlist is fetched at most once per LEADERBOARD_TTL_SECONDS.
+# Concurrent /leaderboard calls share one in-flight fetch, and the Markdown
+# reply is rendered once per refresh.
+
+LEADERBOARD_TTL_SECONDS = float(os.getenv("LEADERBOARD_TTL_SECONDS", "300"))
+LEADERBOARD_SIZE = 5
+BSCSCAN_API_URL = os.getenv("BSCSCAN_API_URL", "https://api.bscscan.com/api")
+
+
+def render(holders):
+    """holders: (address, raw_balance) pairs, largest first."""
+    msg = "🏆 Top $TIFFY Holders:\n"
+    for addr, raw in holders[:LEADERBOARD_SIZE]:
+        bal = int(raw) / 1e18
+        msg += f"`{addr[:6]}...{addr[-4:]}` — {bal:.2f} $TIFFY\n"
+    return msg
+
+
+class LeaderboardCache:
+    def __init__(self, contract, api_key, ttl=LEADERBOARD_TTL_SECONDS, shared=None):
+        self.url = (
+            f"{BSCSCAN_API_URL}?module=token&action=tokenholderlist"
+            f"&contractaddress={contract}&page=1&offset={LEADERBOARD_SIZE}&apikey={api_key}"
+        )
+        self.ttl = ttl
+        self.holders = []
+        self.text = None
+        self.updated_at = 0.0
+        self._inflight = None
+        # Optional shared.SharedValue holding {"holders", "text"} for all workers.
+        self.shared = shared
+
+    def fresh(self):
+        return self.text is not None and time.time() - self.updated_at < self.ttl
+
+    def _adopt(self):
+        hit = self.shared.read()
+        if hit is not None and hit[0] > self.updated_at:
+            self.updated_at, board = hit
+            self.holders, self.text = board["holders"], board["text"]
+
+    async def _fetch(self):
+        if self.shared is not None:
+            self._adopt()
+            if self.fresh():
+                return self.text
+            if not self.shared.claim(self.ttl, timeout=15):
+                # Another worker is fetching; serve what we have meanwhile.
+                if self.text is None:
+                    await asyncio.sleep(1)
+                    self._adopt()
+                if self.text is None:
+                    raise RuntimeError("leaderboard refresh in progress")
+                return self.text
+        data = await breaker.get("bscscan").call(
+            http_client.get_json, self.url, timeout=5, hedge=True
+        )
+        holders = data.get("result", [])
+        if not isinstance(holders, list) or not holders:
+            raise RuntimeError(f"empty tokenholderlist: {data.get('message')}")
+        self.holders = holders
+        self.text = render([(h["TokenHolderAddress"], h["TokenHolderQuantity"]) for h in holders])
+        self.updated_at = time.time()
+        if self.shared is not None:
+            self.shared.write(self.updated_at, {"holders": holders, "text": self.text})
+        return self.text
+
+    def _fetch_done(self, _):
+        self._inflight = None
+
+    def _start(self):
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(self._fetch_done)
+        return self._inflight
+
+    def _log_failure(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            logging.error("Leaderboard refresh error: %s", future.exception())
+
+    def kick(self):
+        """Refresh in the background (startup warm-up, stale inline queries)."""
+        if not self.fresh() and self._inflight is None:
+            self._start().add_done_callback(self._log_failure)
+
+    async def get(self):
+        if self.fresh():
+            return self.text
+        self._start()
+        try:
+            return await asyncio.shield(self._inflight)
+        except Exception as e:
+            if self.text is None:
+                raise
+            # Rate-limited or down: fall back to the last rendered board.
+            logging.error("Leaderboard refresh error: %s", e)
+            return self.text
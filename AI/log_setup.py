@@ -0,0 +1,93 @@
+import os
+import json
+import queue
+import random
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+# --- Logging ---
+# Records go through a QueueHandler so the event loop only enqueues them;
+# a QueueListener thread does the formatting and the stream write.
+# Full Telegram payloads are sampled (LOG_SAMPLE_RATE) and redacted.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | text
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+LOG_REDACT_FIELDS = frozenset(
+    os.getenv(
+        "LOG_REDACT_FIELDS",
+        "first_name,last_name,username,phone_number,email,text,caption",
+    ).split(",")
+)
+
+# Attributes every LogRecord has; anything else came in through extra=.
+_RECORD_FIELDS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup():
+    global _listener
+    if _listener is not None:
+        return
+    stream = logging.StreamHandler()
+    if LOG_FORMAT == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    q = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(q)]
+    root.setLevel(LOG_LEVEL)
+    _listener = QueueListener(q, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop)
+
+
+def stop():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return {
+            k: "***" if k in LOG_REDACT_FIELDS else redact(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    return value
+
+
+_webhook_log = logging.getLogger("webhook")
+
+
+def log_update(body):
+    # Sampling decision first: unsampled updates cost one random() call.
+    if LOG_SAMPLE_RATE <= 0 or random.random() >= LOG_SAMPLE_RATE:
+        return
+    if _webhook_log.isEnabledFor(logging.INFO):
+        _webhook_log.info(
+            "📩 Telegram update",
+            extra={"update_id": body.get("update_id"), "update": redact(body)},
+        )
@@ -1,171 +1,487 @@
 import os
+import time
+import hmac
+import sqlite3
+import asyncio
+import threading
 import logging
-import requests
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Header
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 from telegram import Update
-from telegram.ext import Application, CommandHandler, ContextTypes
+from telegram.ext import Application, CommandHandler, ContextTypes, InlineQueryHandler
+import http_client
+import log_setup
+import breaker
+import metrics
+import diagnostics
+import shared
+from price_cache import PriceCache, PRICE_REFRESH_SECONDS
+from price_history import PriceHistory, HOUR, DAY
+from leaderboard_cache import LeaderboardCache, LEADERBOARD_TTL_SECONDS, LEADERBOARD_SIZE, render as render_leaderboard
+import holders
+from balances import BalanceReader
+from update_queue import UpdateQueue
+from dedup import UpdateDeduper
+import command_registry
+from command_registry import static, dynamic
+from inline import InlineIndex, Dynamic
+from broadcast import Broadcaster, ADMIN_IDS, format_status as format_broadcast_status
+from store import Store
+from throttle import Throttle, SharedRateTable
+from media import MediaRegistry
 
 # --- Setup ---
 load_dotenv()
-logging.basicConfig(level=logging.INFO)
+log_setup.setup()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 RENDER_URL = os.getenv("RENDER_EXTERNAL_URL")
 BSCSCAN_API_KEY = os.getenv("BSCSCAN_API_KEY")
 
-PRICE_API_URL = "https://tiffyai.github.io/TIFFY-Market-Value/price.json"
+PRICE_API_URL = os.getenv("PRICE_API_URL", "https://tiffyai.github.io/TIFFY-Market-Value/price.json")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org/bot")
+# Web server processes. Above 1, per-chat update ordering (update_queue.py)
+# and replay detection (dedup.py) only hold within each worker.
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
+PORT = 8000
 TOKEN_CONTRACT = "0xE488253DD6B4D31431142F1b7601C96f24Fb7dd5"
 PORTAL_LINK = "https://tiffyai.github.io/Activating-Portal"
 STAR_AI_LINK = "https://t.me/TheStarAIBot/StarAI?startapp=aW52aXRhdGlvbl9jb2RlPUsxOXc3dyZwYWdlTmFtZT1hZ2VudHMmSWQ9YWUwNzMzNjQtZTIzZi00ZjQ5LTgzZmItYzM0YjdkMDAxMGJh"
 
+# With several workers (WEB_WORKERS > 1) only the lease holder registers the
+# webhook and runs the singleton jobs (holder index, broadcasts, media
+# warm-up); price, leaderboard and throttle state are shared through
+# SHARED_CACHE_DIR. See shared.py.
+lease = shared.Lease()
+price_cache = PriceCache(PRICE_API_URL, shared=shared.value("price"))
+price_history = PriceHistory()
+price_cache.listeners.append(price_history.add)
+leaderboard_cache = LeaderboardCache(TOKEN_CONTRACT, BSCSCAN_API_KEY, shared=shared.value("leaderboard"))
+# Local holder index from Transfer logs; None unless HOLDERS_START_BLOCK is set.
+holder_index = holders.from_env(TOKEN_CONTRACT)
+balance_reader = BalanceReader(TOKEN_CONTRACT)
+
 # --- Telegram Bot ---
-app = Application.builder().token(BOT_TOKEN).build()
+app = (
+    Application.builder()
+    .token(BOT_TOKEN)
+    .base_url(TELEGRAM_API_URL)
+    .request(metrics.TimedRequest())
+    .build()
+)
+broadcaster = Broadcaster(app.bot)
+# Several workers share bot.db: claims go straight to SQLite (see store.py).
+store = Store(write_through=bool(shared.SHARED_CACHE_DIR))
+throttle = Throttle(table=SharedRateTable() if shared.SHARED_CACHE_DIR else None)
+media = MediaRegistry(app.bot)
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
-        "🔵 Welcome to *TiffyAI*! Tap /claim to unlock your Blue Key portal.",
-        parse_mode="Markdown"
-    )
+# Blue Key milestones (see tokenlist.json blueKeySystem)
+LUCKY_WHEEL_KEYS = 3
+GOLD_KEY_EVERY = 10
 
-async def claim(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
-        f"🚪 Enter the TiffyAI Portal ➤ {PORTAL_LINK}",
-        parse_mode="Markdown"
-    )
+def price_text(price, age=None):
+    text = f"💎 Current $TIFFY price: *${price:.4f}*"
+    if age is not None:
+        text += f"\n_Updated {int(age)}s ago_"
+    return text
 
 async def price(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        r = requests.get(PRICE_API_URL, timeout=5)
-        price = float(r.json().get("tiffyToUSD", 0))
-        await update.message.reply_text(
-            f"💎 Current $TIFFY price: *${price:.4f}*",
-            parse_mode="Markdown"
-        )
+        price, age = await price_cache.get()
+        await update.message.reply_text(price_text(price, age), parse_mode="Markdown")
     except Exception as e:
         logging.error("Price fetch error: %s", e)
         await update.message.reply_text("⚠️ Sorry, price unavailable.")
 
-# --- new install command ---
-async def install(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
-        "📲 *Install TiffyAI to your Home Screen!*\n\n"
-        "1. Open this link ➤ https://tiffyai.github.io/Cortex\n"
-        "2. Tap the browser menu (⋮ or Share icon)\n"
-        "3. Select *Add to Home Screen*\n\n"
-        "Now you can Play & Earn anytime 🚀",
-        parse_mode="Markdown"
+def index_ready():
+    return holder_index is not None and holder_index.synced_at is not None
+
+def change_text(label, stats):
+    if stats is None:
+        return f"{label}: n/a"
+    arrow = "🟢" if stats["change_pct"] >= 0 else "🔴"
+    return f"{label}: {arrow} {stats['change_pct']:+.2f}%"
+
+async def chart(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    day = price_history.stats(DAY)
+    png = price_history.render(DAY)
+    if png is None:
+        await update.message.reply_text("📈 Not enough price history yet — check back in a minute.")
+        return
+    caption = (
+        f"📈 $TIFFY last 24h — now *${price_history.prices[price_history.head - 1]:.4f}*\n"
+        f"{change_text('1h', price_history.stats(HOUR))} · {change_text('24h', day)}\n"
+        f"Avg ${day['avg']:.4f} · Low ${day['min']:.4f} · High ${day['max']:.4f}"
+    )
+    # Upload once per sample; later calls resend Telegram's file_id.
+    version = price_history.version
+    message = await update.message.reply_photo(
+        price_history.file_id or png, caption=caption, parse_mode="Markdown"
+    )
+    if price_history.version == version:
+        price_history.file_id = message.photo[-1].file_id
+
+async def token(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await media.send_photo(
+        update.effective_chat.id, "token",
+        caption=f"🔵 *$TIFFY* on BNB Smart Chain\n`{TOKEN_CONTRACT}`",
+        parse_mode="Markdown",
+        reply_to_message_id=update.message.message_id,
     )
 
-# --- keeping leaderboard (disabled for now) ---
 async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        r = requests.get(
-            f"https://api.bscscan.com/api?module=token&action=tokenholderlist"
-            f"&contractaddress={TOKEN_CONTRACT}&page=1&offset=5&apikey={BSCSCAN_API_KEY}",
-            timeout=5
-        )
-        holders = r.json().get("result", [])
-        msg = "🏆 Top $TIFFY Holders:\n"
-        for h in holders[:5]:
-            bal = int(h["TokenHolderQuantity"]) / 1e18
-            addr = h["TokenHolderAddress"]
-            msg += f"`{addr[:6]}...{addr[-4:]}` — {bal:.2f} $TIFFY\n"
+        if index_ready():
+            msg = render_leaderboard(holder_index.top(LEADERBOARD_SIZE))
+        else:
+            msg = await leaderboard_cache.get()
         await update.message.reply_text(msg, parse_mode="Markdown")
     except Exception as e:
         logging.error("Leaderboard fetch error: %s", e)
         await update.message.reply_text("⚠️ Leaderboard unavailable.")
 
-async def wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
-        "🔐 *Wallets Supported:*\n\n"
-        "- OKX\n"
-        "- Trust Wallet\n"
-        "- MetaMask\n\n"
-        "Connect through ➤ https://tiffyai.github.io/Start",
-        parse_mode="Markdown"
-    )
+def is_address(text):
+    return len(text) == 42 and text[:2] == "0x" and all(c in "0123456789abcdefABCDEF" for c in text[2:])
 
-async def info(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def rank(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not index_ready():
+        await update.message.reply_text("⏳ Holder ranks are still syncing — try again soon.")
+        return
+    address = context.args[0] if context.args else ""
+    if not is_address(address):
+        await update.message.reply_text("Usage: /rank <wallet address>")
+        return
+    place, raw, total = holder_index.rank(address)
+    if place is None:
+        await update.message.reply_text("🔍 That wallet holds no $TIFFY yet.")
+        return
     await update.message.reply_text(
-        "📘 *About $TIFFY Token:*\n\n"
-        "TIFFY powers the TiffyAI ecosystem.\n"
-        "- Earn it via games, quests & faucets\n"
-        "- Stake & AI Trading available soon\n\n"
-        "Explore ➤ https://www.tiffyai.co.za",
+        f"🏅 `{address[:6]}...{address[-4:]}` is *#{place}* of {total} holders "
+        f"with {raw / 1e18:.2f} $TIFFY",
         parse_mode="Markdown"
     )
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    address = context.args[0] if context.args else ""
+    if not is_address(address):
+        await update.message.reply_text("Usage: /balance <wallet address>")
+        return
+    try:
+        raw = await balance_reader.get(address)
+        await update.message.reply_text(
+            f"👛 `{address[:6]}...{address[-4:]}` holds *{raw / 1e18:,.2f}* $TIFFY",
+            parse_mode="Markdown"
+        )
+    except Exception as e:
+        logging.error("Balance lookup error: %s", e)
+        await update.message.reply_text("⚠️ Balance unavailable, try again shortly.")
+
+def key_progress(keys):
+    if keys < LUCKY_WHEEL_KEYS:
+        return f"{LUCKY_WHEEL_KEYS - keys} more to the 🎡 Lucky Wheel"
+    return f"{GOLD_KEY_EVERY - keys % GOLD_KEY_EVERY} more to your next 🥇 Gold Key"
+
+async def claim(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    try:
+        claimed, user, left = store.claim(update.effective_user.id)
+    except sqlite3.OperationalError as e:
+        # bot.db busy (another worker writing): don't hold the loop waiting.
+        logging.warning("Claim deferred: %s", e)
+        await update.message.reply_text("⏳ Busy right now — try /claim again in a moment.")
+        return
+    keys = user["keys"]
+    if claimed:
+        head = f"🔵 Blue Key claimed! You now hold *{keys}* 🔑"
+        if keys == LUCKY_WHEEL_KEYS:
+            head += "\n🎡 Lucky Wheel unlocked!"
+        elif keys % GOLD_KEY_EVERY == 0:
+            head += "\n🥇 Gold Key earned!"
+    else:
+        minutes, seconds = divmod(int(left) + 1, 60)
+        head = f"⏳ Next Blue Key in *{minutes}m {seconds:02d}s* — you hold *{keys}* 🔑"
     await update.message.reply_text(
-        "🛠️ *Bot Help Guide:*\n\n"
-        "`/start` – Intro\n"
-        "`/claim` – Portal link\n"
-        "`/wallet` – Wallet options\n"
-        "`/price` – Check token value\n"
-        "`/install` – Add TiffyAI Platform to Home screen\n"
-        "`/info` – Token overview\n"
-        "`/ai` – Chat with Tiffy AI\n"
-        "`/help` – This guide",
+        f"{head}\n{key_progress(keys)}\n\n🚪 Enter the TiffyAI Portal ➤ {PORTAL_LINK}",
         parse_mode="Markdown"
     )
 
-async def ai(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    broadcaster.subscribe(update.effective_chat.id)
+
+async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id not in ADMIN_IDS:
+        return
+    # Split on any whitespace: the text may start on the next line.
+    parts = update.message.text.split(maxsplit=1)
+    text = parts[1].strip() if len(parts) > 1 else ""
+    if not text:
+        jobs = sorted(broadcaster.metrics)
+        status = broadcaster.status(jobs[-1]) if jobs else None
+        await update.message.reply_text(f"📣 {format_broadcast_status(status) if status else 'No broadcasts yet.'}")
+        return
+    try:
+        command_registry.check_markdown(text)
+    except ValueError as e:
+        await update.message.reply_text(
+            f"⚠️ Not sent: bad Markdown ({e}).\nUsage: /broadcast <Markdown text>"
+        )
+        return
+    # Only the leader sends; other workers queue the job for it.
+    job_id = broadcaster.create(text, parse_mode="Markdown", run=lease.held)
     await update.message.reply_text(
-        f"🌟 Chat with Tiffy AI ➤ [Launch Star AI]({STAR_AI_LINK})",
-        parse_mode="Markdown",
-        disable_web_page_preview=True
+        f"📣 Broadcast #{job_id} started to {broadcaster.subscriber_count()} subscribers."
     )
 
 # --- Register Commands ---
+# Order here is the order in /help and the Telegram command menu.
 commands = [
-    ("start", start),
-    ("claim", claim),
-    ("price", price),
-    ("install", install),  # ✅ active
-    # ("leaderboard", leaderboard),  # ❌ disabled for now
-    ("wallet", wallet),
-    ("info", info),
-    ("help", help_command),
-    ("ai", ai),
+    static(
+        "start", "Intro",
+        "🔵 Welcome to *TiffyAI*! Tap /claim to unlock your Blue Key portal."
+    ),
+    dynamic("claim", "Claim a Blue Key & portal link", claim),
+    static(
+        "wallet", "Wallet options",
+        "🔐 *Wallets Supported:*\n\n"
+        "- OKX\n"
+        "- Trust Wallet\n"
+        "- MetaMask\n\n"
+        "Connect through ➤ https://tiffyai.github.io/Start"
+    ),
+    dynamic("price", "Check token value", price),
+    dynamic("chart", "24h price chart", chart),
+    dynamic("leaderboard", "Top holders", leaderboard),
+    dynamic("balance", "Your $TIFFY balance: /balance <address>", balance),
+    dynamic("rank", "Your holder rank: /rank <address>", rank),
+    dynamic("token", "Token logo & contract address", token),
+    static(
+        "install", "Add TiffyAI Platform to Home screen",
+        "📲 *Install TiffyAI to your Home Screen!*\n\n"
+        "1. Open this link ➤ https://tiffyai.github.io/Cortex\n"
+        "2. Tap the browser menu (⋮ or Share icon)\n"
+        "3. Select *Add to Home Screen*\n\n"
+        "Now you can Play & Earn anytime 🚀"
+    ),
+    static(
+        "info", "Token overview",
+        "📘 *About $TIFFY Token:*\n\n"
+        "TIFFY powers the TiffyAI ecosystem.\n"
+        "- Earn it via games, quests & faucets\n"
+        "- Stake & AI Trading available soon\n\n"
+        "Explore ➤ https://www.tiffyai.co.za"
+    ),
+    static(
+        "ai", "Chat with Tiffy AI",
+        f"🌟 Chat with Tiffy AI ➤ [Launch Star AI]({STAR_AI_LINK})",
+        preview=False
+    ),
+    dynamic("broadcast", "Send a message to all subscribers", broadcast_command, menu=False),
 ]
+commands.append(command_registry.help_command(commands))
 
-for cmd, func in commands:
-    app.add_handler(CommandHandler(cmd, func))
+def instrument(name, callback):
+    return metrics.timed(name, diagnostics.tagged(name, callback))
+
+for handler in command_registry.build(commands, wrap=instrument):
+    app.add_handler(handler)
+
+# Anti-spam runs first and stops throttled commands from reaching any handler.
+app.add_handler(throttle.handler(), group=-2)
+# Runs before the /start reply (group 0) to record the chat for broadcasts.
+app.add_handler(CommandHandler("start", subscribe), group=-1)
+
+# --- Inline Mode ---
+inline_index = InlineIndex(commands, dynamic=[
+    Dynamic(
+        "price", "Check token value",
+        render=lambda: price_text(price_cache.price) if price_cache.price is not None else None,
+        version=lambda: price_cache.updated_at,
+        cache_time=lambda: PRICE_REFRESH_SECONDS - (price_cache.age() or 0),
+        refresh=lambda: asyncio.ensure_future(price_cache.refresh()),
+    ),
+    Dynamic(
+        "leaderboard", "Top holders",
+        render=lambda: (
+            render_leaderboard(holder_index.top(LEADERBOARD_SIZE)) if index_ready() else leaderboard_cache.text
+        ),
+        version=lambda: holder_index.next_block if index_ready() else leaderboard_cache.updated_at,
+        cache_time=lambda: (
+            holders.HOLDERS_POLL_SECONDS if index_ready()
+            else LEADERBOARD_TTL_SECONDS - (time.time() - leaderboard_cache.updated_at)
+        ),
+        refresh=lambda: None if index_ready() else leaderboard_cache.kick(),
+    ),
+])
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    results, cache_time = inline_index.answer(update.inline_query.query)
+    await update.inline_query.answer(results, cache_time=cache_time)
+
+app.add_handler(InlineQueryHandler(instrument("inline", inline_query)))
+
+update_queue = UpdateQueue(app.process_update)
+deduper = UpdateDeduper()
+loop_monitor = metrics.LoopMonitor()
+blocking_detector = diagnostics.BlockingDetector()
+
+# --- Metrics ---
+metrics.register("tiffy_updates_in_flight", "Updates being processed right now.", lambda: update_queue.in_flight)
+metrics.register("tiffy_update_queue_depth", "Updates waiting for a worker.", lambda: update_queue.pending)
+metrics.register("tiffy_update_queue_capacity", "Update queue size limit.", lambda: update_queue.maxsize)
+metrics.register("tiffy_update_lanes", "Chats with queued or running updates.", lambda: len(update_queue.lanes))
+metrics.register("tiffy_updates_total", "Webhook updates by outcome.", lambda: {
+    "accepted": update_queue.accepted,
+    "rejected": update_queue.rejected,
+    "processed": update_queue.processed,
+    "errors": update_queue.errors,
+    "duplicate": deduper.dropped,
+}, "counter", "outcome")
+metrics.register("tiffy_throttled_total", "Commands dropped by the anti-spam throttle.", lambda: throttle.throttled, "counter")
+metrics.register("tiffy_price_age_seconds", "Age of the cached price.", price_cache.age)
+metrics.register("tiffy_event_loop_stalls_total", "Loop stalls over BLOCKING_THRESHOLD_MS by command.",
+                 lambda: dict(blocking_detector.stalls), "counter", "command")
+
+# Readiness limits for /healthcheck.
+READY_MAX_LOOP_LAG = float(os.getenv("READY_MAX_LOOP_LAG", "1"))
+READY_MAX_QUEUE_FILL = float(os.getenv("READY_MAX_QUEUE_FILL", "0.9"))
+ready = False
 
 # --- FastAPI Web Server ---
 web = FastAPI()
 
+async def become_leader(initial):
+    # Pending updates are only dropped on a cold start; a worker taking over
+    # from a dead leader keeps them, since Telegram kept delivering to us.
+    if initial:
+        await app.bot.delete_webhook(drop_pending_updates=True)
+    await app.bot.set_webhook(f"{RENDER_URL}/telegram")
+    await app.bot.set_my_commands(command_registry.bot_commands(commands))
+    webhook_info = await app.bot.get_webhook_info()
+    logging.info("✅ Webhook set to: %s", webhook_info.url)
+    if holder_index is not None:
+        holder_index.start()
+    broadcaster.watch()
+    asyncio.create_task(media.warm_up())
+
 @web.on_event("startup")
 async def startup():
+    global ready
+    loop_monitor.start()
+    blocking_detector.start()
+    deduper.load()
+    price_history.load()
+    await http_client.start()
+    price_cache.start()
+    if not index_ready():
+        leaderboard_cache.kick()
     await app.initialize()
     await app.start()
-    await app.bot.delete_webhook(drop_pending_updates=True)
-    await app.bot.set_webhook(f"{RENDER_URL}/telegram")
-    webhook_info = await app.bot.get_webhook_info()
-    logging.info("✅ Webhook set to: %s", webhook_info.url)
+    store.start()
+    update_queue.start()
+    if lease.try_acquire():
+        await become_leader(initial=True)
+    else:
+        if holder_index is not None:
+            # Serve the leader's index from bot.db until we take over.
+            holder_index.start(follow=True)
+        lease.watch(become_leader)
+    ready = True
 
 @web.on_event("shutdown")
 async def shutdown():
+    global ready
+    ready = False
+    await update_queue.stop()
+    await broadcaster.stop()
+    await store.stop()
     await app.stop()
     await app.shutdown()
+    await price_cache.stop()
+    if holder_index is not None:
+        await holder_index.stop()
+    await http_client.close()
+    # One writer per file; followers' state is rebuilt from the shared cache.
+    if lease.held:
+        deduper.save()
+        price_history.save()
+    await lease.release()
+    await loop_monitor.stop()
+    await blocking_detector.stop()
 
 @web.post("/telegram")
 async def incoming(request: Request):
     body = await request.json()
-    logging.info("📩 Telegram update: %s", body)
+    update_id = body.get("update_id")
+    if deduper.check(update_id):
+        return {"status": "duplicate"}
+    log_setup.log_update(body)
     update = Update.de_json(body, app.bot)
-    await app.process_update(update)
+    if not update_queue.put(update):
+        return JSONResponse({"status": "busy"}, status_code=503)
+    deduper.mark(update_id)
     return {"status": "ok"}
 
 @web.get("/")
 async def root():
     return {"message": "TiffyAI Bot Running Clean 🧼"}
 
+@web.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+profiling = False
+
+@web.get("/admin/profile")
+async def admin_profile(seconds: float = 10, interval_ms: float = 5, authorization: str = Header("")):
+    """Sample the live process; returns collapsed stacks for flamegraph tools."""
+    global profiling
+    if not diagnostics.ADMIN_TOKEN:
+        return JSONResponse({"error": "not found"}, status_code=404)
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {diagnostics.ADMIN_TOKEN}".encode()):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    if profiling:
+        return JSONResponse({"error": "a profile is already running"}, status_code=409)
+    profiling = True
+    try:
+        stacks = await asyncio.to_thread(
+            diagnostics.profile, seconds, max(interval_ms, 1) / 1000,
+            asyncio.get_running_loop(), threading.get_ident(),
+        )
+    finally:
+        profiling = False
+    return PlainTextResponse(stacks)
+
 @web.get("/healthcheck")
 async def health():
-    return {"status": "Alive & Kicking"}
+    # Not ready (503) while starting/stopping, when the event loop is lagging
+    # or the update queue is nearly full. An open upstream breaker only marks
+    # the bot degraded: cached and static replies still work.
+    problems = []
+    if not ready:
+        problems.append("not started")
+    if loop_monitor.last > READY_MAX_LOOP_LAG:
+        problems.append(f"event loop lag {loop_monitor.last:.2f}s")
+    if update_queue.pending >= update_queue.maxsize * READY_MAX_QUEUE_FILL:
+        problems.append(f"update queue {update_queue.pending}/{update_queue.maxsize}")
+    degraded = sorted(name for name, b in breaker.breakers.items() if b.state != "closed")
+    body = {
+        "status": "not ready" if problems else ("degraded" if degraded else "Alive & Kicking"),
+        "problems": problems,
+        "degraded": degraded,
+        "loop_lag_ms": round(loop_monitor.last * 1000, 1),
+        "queue": update_queue.stats(),
+        "duplicates": deduper.dropped,
+        "dependencies": breaker.stats(),
+        "throttle": throttle.stats(),
+        "holders": holder_index.stats() if holder_index is not None else None,
+        "balances": balance_reader.stats(),
+        "media": media.stats(),
+    }
+    return JSONResponse(body, status_code=503 if problems else 200)
 
 if __name__ == "__main__":
-    uvicorn.run("main:web", host="0.0.0.0", port=8000)
+    if WEB_WORKERS > 1 and not shared.SHARED_CACHE_DIR:
+        # Read by each worker when it imports shared.py.
+        os.environ["SHARED_CACHE_DIR"] = shared.default_dir(PORT)
+    uvicorn.run("main:web", host="0.0.0.0", port=PORT, workers=WEB_WORKERS)
@@ -0,0 +1,122 @@
+import os
+import time
+import hashlib
+import logging
+from telegram.error import BadRequest
+import store
+
+# --- Uploaded media registry ---
+# The token logo and loading screens are large files. Each is uploaded to
+# Telegram once and the returned file_id is stored in bot.db, keyed by the
+# SHA-256 of the file contents; later sends pass the file_id and no bytes.
+# Editing a file changes its hash, which triggers a fresh upload. If Telegram
+# rejects a stored id, it is dropped and the file re-uploaded once.
+
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+# Optional chat (e.g. a private channel) to pre-upload every asset at startup.
+MEDIA_WARMUP_CHAT_ID = os.getenv("MEDIA_WARMUP_CHAT_ID")
+
+ASSETS = {
+    "token": "TiffyAI-Token.png",
+    "loading": "loading.jpg",
+    "loading1": "loading1.jpg",
+    "loading2": "loading2.jpg",
+    "loading3": "loading3.jpg",
+    "loading4": "loading4.jpg",
+    "loading5": "loading5.jpg",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    sha256 TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    uploaded_at REAL NOT NULL
+);
+"""
+store.register_schema(SCHEMA)
+
+
+def _stale_file_id(error):
+    text = str(error).lower()
+    return "file identifier" in text or "file reference" in text or "wrong remote file" in text
+
+
+class MediaRegistry:
+    def __init__(self, bot, db=None, root=MEDIA_ROOT, assets=ASSETS):
+        self.bot = bot
+        self.db = db or store.connection()
+        self.root = root
+        self.assets = assets
+        self._hashes = {}    # path -> (mtime_ns, size, sha256)
+        self._file_ids = {}  # sha256 -> file_id
+        self.uploads = 0
+        self.reuses = 0
+
+    def _digest(self, path):
+        st = os.stat(path)
+        cached = self._hashes.get(path)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        self._hashes[path] = (st.st_mtime_ns, st.st_size, digest)
+        return digest
+
+    def file_id(self, digest):
+        file_id = self._file_ids.get(digest)
+        if file_id is None:
+            row = self.db.execute("SELECT file_id FROM media WHERE sha256 = ?", (digest,)).fetchone()
+            if row is not None:
+                file_id = self._file_ids[digest] = row[0]
+        return file_id
+
+    def _remember(self, digest, name, file_id):
+        self._file_ids[digest] = file_id
+        self.db.execute(
+            "INSERT INTO media (sha256, name, file_id, uploaded_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(sha256) DO UPDATE SET file_id = excluded.file_id, uploaded_at = excluded.uploaded_at",
+            (digest, name, file_id, time.time()),
+        )
+
+    def _forget(self, digest):
+        self._file_ids.pop(digest, None)
+        self.db.execute("DELETE FROM media WHERE sha256 = ?", (digest,))
+
+    async def send_photo(self, chat_id, name, **kwargs):
+        path = os.path.join(self.root, self.assets[name])
+        digest = self._digest(path)
+        file_id = self.file_id(digest)
+        if file_id is not None:
+            try:
+                message = await self.bot.send_photo(chat_id, file_id, **kwargs)
+                self.reuses += 1
+                return message
+            except BadRequest as e:
+                if not _stale_file_id(e):
+                    raise
+                logging.warning("🖼️ Stored file_id for %s rejected, re-uploading", name)
+                self._forget(digest)
+        with open(path, "rb") as f:
+            message = await self.bot.send_photo(chat_id, f, **kwargs)
+        self.uploads += 1
+        self._remember(digest, name, message.photo[-1].file_id)
+        return message
+
+    async def warm_up(self, chat_id=MEDIA_WARMUP_CHAT_ID):
+        """Upload every asset without a stored file_id to chat_id."""
+        if not chat_id:
+            return
+        for name, filename in self.assets.items():
+            path = os.path.join(self.root, filename)
+            try:
+                if self.file_id(self._digest(path)) is None:
+                    await self.send_photo(chat_id, name, disable_notification=True)
+            except Exception as e:
+                logging.error("Media warm-up for %s failed: %s", name, e)
+
+    def stats(self):
+        return {"uploads": self.uploads, "reuses": self.reuses, "known": len(self._file_ids)}
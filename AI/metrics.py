@@ -0,0 +1,203 @@
+import os
+import time
+import asyncio
+import bisect
+import functools
+from telegram.request import HTTPXRequest
+import breaker
+
+# --- Metrics (Prometheus text format) ---
+# Handlers and upstream calls record into fixed-bucket histograms: one bisect
+# and two additions per observation, no locks (everything runs on the event
+# loop thread). Counters and gauges owned by other modules (queue depth,
+# in-flight updates, breaker calls/errors) are read only when /metrics is
+# scraped, via registered callbacks. A background task measures event-loop
+# lag by timing how late a fixed sleep wakes up.
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    def __init__(self, name, help, label=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self.series = {}  # label value -> [bucket counts, sum, count]
+
+    def observe(self, value, label=None):
+        s = self.series.get(label)
+        if s is None:
+            s = self.series[label] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        s[0][bisect.bisect_left(self.buckets, value)] += 1
+        s[1] += value
+        s[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label, (counts, total, count) in self.series.items():
+            base = [(self.label, label)] if self.label else []
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(base + [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(base)} {total}")
+            lines.append(f"{self.name}_count{_labels(base)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values = {}
+
+    def inc(self, label=None, n=1):
+        self.values[label] = self.values.get(label, 0) + n
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label, value in self.values.items():
+            lines.append(f"{self.name}{_labels([(self.label, label)] if self.label else [])} {value}")
+        return lines
+
+
+class Callback:
+    """A metric read on scrape: fn() returns a number or {label: number}."""
+
+    def __init__(self, name, help, fn, kind="gauge", label=None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.kind = kind
+        self.label = label
+
+    def render(self):
+        value = self.fn()
+        if value is None:
+            return []
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if isinstance(value, dict):
+            for label, v in value.items():
+                lines.append(f"{self.name}{_labels([(self.label, label)])} {v}")
+        else:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+
+command_seconds = Histogram("tiffy_command_duration_seconds", "Handler time per command.", "command")
+command_errors = Counter("tiffy_command_errors_total", "Handler exceptions per command.", "command")
+loop_lag = Histogram("tiffy_event_loop_lag_seconds", "How late a timed sleep woke up.", buckets=LAG_BUCKETS)
+telegram_seconds = Histogram("tiffy_telegram_api_duration_seconds", "Bot API call time per method.", "method")
+telegram_errors = Counter("tiffy_telegram_api_errors_total", "Failed Bot API calls per method.", "method")
+
+registry = [command_seconds, command_errors, loop_lag, telegram_seconds, telegram_errors]
+
+
+def register(name, help, fn, kind="gauge", label=None):
+    registry.append(Callback(name, help, fn, kind, label))
+
+
+def timed(name, callback):
+    """Wrap a PTB handler callback to record its duration and errors."""
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception:
+            command_errors.inc(name)
+            raise
+        finally:
+            command_seconds.observe(time.perf_counter() - started, name)
+    return wrapper
+
+
+class TimedRequest(HTTPXRequest):
+    """PTB's HTTPX transport with every Bot API call timed per method."""
+
+    def __init__(self, connection_pool_size=256, **kwargs):
+        super().__init__(connection_pool_size=connection_pool_size, **kwargs)
+
+    async def do_request(self, url, method, *args, **kwargs):
+        api_method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+        except Exception:
+            telegram_errors.inc(api_method)
+            raise
+        finally:
+            telegram_seconds.observe(time.perf_counter() - started, api_method)
+        if code >= 400:
+            telegram_errors.inc(api_method)
+        return code, payload
+
+
+def _dependency_histograms():
+    # Breakers already time every upstream call; re-expose their buckets.
+    name = "tiffy_upstream_duration_seconds"
+    lines = [f"# HELP {name} Upstream call time per dependency.", f"# TYPE {name} histogram"]
+    bounds = tuple(ms / 1000 for ms in breaker.LATENCY_BUCKETS_MS) + ("+Inf",)
+    for dep, b in breaker.breakers.items():
+        cumulative = 0
+        for bound, n in zip(bounds, b.buckets):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels([('dependency', dep), ('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_labels([('dependency', dep)])} {b.seconds_total}")
+        lines.append(f"{name}_count{_labels([('dependency', dep)])} {sum(b.buckets)}")
+    return lines
+
+
+register("tiffy_upstream_calls_total", "Upstream calls per dependency.",
+         lambda: {d: b.calls for d, b in breaker.breakers.items()}, "counter", "dependency")
+register("tiffy_upstream_errors_total", "Failed upstream calls per dependency.",
+         lambda: {d: b.errors for d, b in breaker.breakers.items()}, "counter", "dependency")
+register("tiffy_upstream_short_circuited_total", "Calls refused by an open breaker.",
+         lambda: {d: b.short_circuited for d, b in breaker.breakers.items()}, "counter", "dependency")
+register("tiffy_upstream_open", "1 while the dependency's breaker is not closed.",
+         lambda: {d: int(b.state != "closed") for d, b in breaker.breakers.items()}, "gauge", "dependency")
+
+
+def render():
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    lines.extend(_dependency_histograms())
+    return "\n".join(lines) + "\n"
+
+
+class LoopMonitor:
+    def __init__(self, interval=LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.last = 0.0
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.last = max(0.0, time.perf_counter() - started - self.interval)
+            loop_lag.observe(self.last)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,105 @@
+import os
+import time
+import asyncio
+import logging
+import http_client
+import breaker
+
+# --- Background-refreshed price cache ---
+# A single task polls price.json every PRICE_REFRESH_SECONDS and keeps the
+# last good tiffyToUSD in memory. /price only reads from here.
+
+PRICE_REFRESH_SECONDS = float(os.getenv("PRICE_REFRESH_SECONDS", "30"))
+# Past this age a read triggers an immediate refresh but still answers from
+# memory (stale-while-revalidate).
+PRICE_STALE_SECONDS = float(os.getenv("PRICE_STALE_SECONDS", "90"))
+
+
+class PriceCache:
+    def __init__(self, url, interval=PRICE_REFRESH_SECONDS, stale_after=PRICE_STALE_SECONDS, shared=None):
+        self.url = url
+        # Optional shared.SharedValue: workers adopt each other's refreshes
+        # and only the one that claims a stale value fetches price.json.
+        self.shared = shared
+        self.interval = interval
+        self.stale_after = stale_after
+        self.price = None
+        self.updated_at = None
+        self.last_error = None
+        self._task = None
+        self._refreshing = None
+        # Called as fn(updated_at, price) after each successful refresh.
+        self.listeners = []
+
+    def age(self):
+        if self.updated_at is None:
+            return None
+        return time.time() - self.updated_at
+
+    def _kick(self):
+        # Collapse overlapping refreshes (loop tick + stale reads) into one fetch.
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._fetch())
+            self._refreshing.add_done_callback(self._refresh_done)
+        return self._refreshing
+
+    def _refresh_done(self, _):
+        self._refreshing = None
+
+    async def refresh(self):
+        return await asyncio.shield(self._kick())
+
+    def _set(self, price, updated_at):
+        self.price = price
+        self.updated_at = updated_at
+        self.last_error = None
+        for fn in self.listeners:
+            fn(self.updated_at, self.price)
+
+    async def _fetch(self):
+        if self.shared is not None:
+            hit = self.shared.read()
+            if hit is not None and (self.updated_at is None or hit[0] > self.updated_at):
+                self._set(hit[1], hit[0])
+            if not self.shared.claim(self.interval / 2, timeout=10):
+                return self.price
+        try:
+            data = await breaker.get("price").call(
+                http_client.get_json, self.url, timeout=5, hedge=True
+            )
+            self._set(float(data.get("tiffyToUSD", 0)), time.time())
+            if self.shared is not None:
+                self.shared.write(self.updated_at, self.price)
+        except Exception as e:
+            # Keep serving the last known good price.
+            self.last_error = e
+            logging.error("Price refresh error: %s", e)
+        return self.price
+
+    async def _loop(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def get(self):
+        """Return (price, age_seconds). Raises if no price was ever fetched."""
+        if self.price is None:
+            await self.refresh()
+            if self.price is None:
+                raise RuntimeError(f"price unavailable: {self.last_error}")
+        elif self.age() > self.stale_after:
+            self._kick()
+        return self.price, self.age()
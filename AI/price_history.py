@@ -0,0 +1,168 @@
+import os
+import time
+import zlib
+import struct
+import logging
+from array import array
+
+# --- Price history ---
+# Every successful price.json refresh is appended to a fixed-size ring
+# buffer (two array('d'): timestamps and prices), so memory is constant and
+# there is no per-sample object. Window stats (change, time-weighted average,
+# min/max) slice the arrays directly. /chart renders a small PNG sparkline
+# from the last 24h; the bytes and the Telegram file_id are cached until the
+# next sample, so repeated /chart calls resend the same file_id.
+#
+# price.json has no volume, so the "VWAP" here is weighted by time held
+# (TWAP): each price counts for as long as it was current.
+
+PRICE_HISTORY_SIZE = int(os.getenv("PRICE_HISTORY_SIZE", "4096"))
+PRICE_HISTORY_FILE = os.getenv("PRICE_HISTORY_FILE", "price_history.bin")
+CHART_WIDTH = 320
+CHART_HEIGHT = 96
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Palette: background, area fill, rising line, falling line.
+_PALETTE = bytes((16, 20, 40, 30, 60, 110, 0, 200, 120, 230, 70, 90))
+_BG, _FILL, _UP, _DOWN = range(4)
+
+
+def _chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(rows, width, height):
+    """Encode palette-indexed rows (bytearrays of width) as a PNG."""
+    raw = b"".join(b"\x00" + bytes(row) for row in rows)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0))
+        + _chunk(b"PLTE", _PALETTE)
+        + _chunk(b"IDAT", zlib.compress(raw, 9))
+        + _chunk(b"IEND", b"")
+    )
+
+
+class PriceHistory:
+    def __init__(self, size=PRICE_HISTORY_SIZE, path=PRICE_HISTORY_FILE):
+        self.size = size
+        self.path = path
+        self.times = array("d", bytes(8 * size))
+        self.prices = array("d", bytes(8 * size))
+        self.head = 0   # next slot to write
+        self.count = 0
+        self.version = 0
+        self._png = None
+        self.file_id = None
+
+    def add(self, t, price):
+        if self.count and t <= self.times[(self.head - 1) % self.size]:
+            return
+        self.times[self.head] = t
+        self.prices[self.head] = price
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.version += 1
+        self._png = None
+        self.file_id = None
+
+    def _ordered(self):
+        """(times, prices) oldest first, as array slices."""
+        if self.count < self.size:
+            return self.times[:self.count], self.prices[:self.count]
+        h = self.head
+        return self.times[h:] + self.times[:h], self.prices[h:] + self.prices[:h]
+
+    def window(self, seconds, now=None):
+        times, prices = self._ordered()
+        if not times:
+            return times, prices
+        now = time.time() if now is None else now
+        cutoff = now - seconds
+        # Times are sorted; bisect for the first sample inside the window,
+        # keeping the one just before it as the opening price.
+        lo, hi = 0, len(times)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if times[mid] < cutoff:
+                lo = mid + 1
+            else:
+                hi = mid
+        start = max(0, lo - 1)
+        return times[start:], prices[start:]
+
+    def stats(self, seconds, now=None):
+        now = time.time() if now is None else now
+        times, prices = self.window(seconds, now)
+        if not prices:
+            return None
+        first, last = prices[0], prices[-1]
+        # Time-weighted: each sample holds until the next one (or now).
+        spans = [b - a for a, b in zip(times, times[1:])] + [max(0.0, now - times[-1])]
+        total = sum(spans)
+        avg = sum(p * s for p, s in zip(prices, spans)) / total if total > 0 else last
+        return {
+            "change_pct": (last - first) / first * 100 if first else 0.0,
+            "avg": avg,
+            "min": min(prices),
+            "max": max(prices),
+            "samples": len(prices),
+            "covered_seconds": now - times[0],
+        }
+
+    def render(self, seconds=DAY, width=CHART_WIDTH, height=CHART_HEIGHT):
+        """PNG sparkline of the window, cached until the next sample."""
+        if self._png is not None:
+            return self._png
+        _, prices = self.window(seconds)
+        if len(prices) < 2:
+            return None
+        lo, hi = min(prices), max(prices)
+        span = (hi - lo) or 1.0
+        n = len(prices)
+        # One price per column (nearest sample), mapped to a row (0 = top).
+        pad = 4
+        usable = height - 2 * pad
+        ys = [
+            pad + int((hi - prices[min(n - 1, x * n // width)]) / span * (usable - 1))
+            for x in range(width)
+        ]
+        line = _UP if prices[-1] >= prices[0] else _DOWN
+        rows = [bytearray([_BG]) * width for _ in range(height)]
+        prev = ys[0]
+        for x, y in enumerate(ys):
+            for r in range(y + 1, height):
+                rows[r][x] = _FILL
+            for r in range(min(prev, y), max(prev, y) + 1):
+                rows[r][x] = line
+            prev = y
+        self._png = encode_png(rows, width, height)
+        return self._png
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = array("d")
+                data.frombytes(f.read())
+            for t, p in zip(data[0::2], data[1::2]):
+                self.add(t, p)
+            logging.info("📈 Price history restored: %d samples", self.count)
+        except Exception as e:
+            logging.error("Price history load error: %s", e)
+
+    def save(self):
+        if not self.path or not self.count:
+            return
+        times, prices = self._ordered()
+        data = array("d", bytes(16 * len(times)))
+        data[0::2], data[1::2] = times, prices
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                data.tofile(f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logging.error("Price history save error: %s", e)
@@ -0,0 +1,54 @@
+import os
+import itertools
+import http_client
+import breaker
+
+# --- BSC JSON-RPC ---
+# Thin helpers over the shared HTTP pool. batch() sends several calls in one
+# JSON-RPC batch request (one HTTP round-trip) and returns per-call results
+# in order, with an RPCError in place of any call that failed.
+
+BSC_RPC_URL = os.getenv("BSC_RPC_URL", "https://bsc-dataseed.binance.org")
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "15"))
+
+_ids = itertools.count(1)
+
+
+class RPCError(Exception):
+    pass
+
+
+async def call(method, params, url=BSC_RPC_URL, timeout=RPC_TIMEOUT):
+    data = await breaker.get("bsc_rpc").call(
+        http_client.post_json,
+        url,
+        json={"jsonrpc": "2.0", "id": next(_ids), "method": method, "params": params},
+        timeout=timeout,
+    )
+    if "error" in data:
+        raise RPCError(f"{method}: {data['error']}")
+    return data["result"]
+
+
+async def batch(calls, url=BSC_RPC_URL, timeout=RPC_TIMEOUT):
+    """calls: (method, params) pairs. Returns results (or RPCError) in order."""
+    ids = [next(_ids) for _ in calls]
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in zip(ids, calls)
+    ]
+    data = await breaker.get("bsc_rpc").call(http_client.post_json, url, json=payload, timeout=timeout)
+    if isinstance(data, dict):
+        # Some nodes answer a rejected batch with a single error object.
+        raise RPCError(str(data.get("error", data)))
+    by_id = {item.get("id"): item for item in data}
+    results = []
+    for i, (method, _) in zip(ids, calls):
+        item = by_id.get(i)
+        if item is None:
+            results.append(RPCError(f"{method}: no response"))
+        elif "error" in item:
+            results.append(RPCError(f"{method}: {item['error']}"))
+        else:
+            results.append(item["result"])
+    return results
@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import fcntl
+import mmap
+import struct
+import asyncio
+import logging
+import tempfile
+import contextlib
+
+# --- Cross-process state for multi-worker serving ---
+# With WEB_WORKERS > 1, uvicorn forks several copies of main.py that share
+# one listening socket. What they must agree on lives in small mmap'd files
+# under SHARED_CACHE_DIR (default: /dev/shm/tiffy-shared-<uid>-<port>):
+#   - SharedValue: one JSON value + timestamp (price, leaderboard). Readers
+#     never block: a sequence counter (seqlock) tells them to retry if a
+#     write was in progress. Writers serialize on flock. claim() lets exactly
+#     one worker refresh a stale value while the others keep serving it.
+#   - Segment: a raw mmap + lock, used by throttle.SharedRateTable.
+#   - Lease: flock on webhook.lock; its holder registers the webhook and
+#     runs the singleton jobs. Followers retry, so a new leader takes over if
+#     the old one exits.
+# Unset SHARED_CACHE_DIR (the single-process default) disables all of it.
+
+SHARED_CACHE_DIR = os.getenv("SHARED_CACHE_DIR")
+LEADER_RETRY_SECONDS = float(os.getenv("LEADER_RETRY_SECONDS", "5"))
+VALUE_SIZE = 64 * 1024
+READ_SPINS = 100
+
+# seq, payload length, updated_at, claimed_at
+_HEADER = struct.Struct("<QIdd")
+_PAYLOAD = 32
+
+
+def default_dir(port):
+    """A fixed directory per listening port, reused by every launch.
+
+    Reuse bounds the tmpfs used to one set of segments. Nothing in it goes
+    bad across restarts: values carry their timestamps, torn writes are
+    repaired on read, and the lease flock dies with its holder.
+    """
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    path = os.path.join(base, f"tiffy-shared-{os.getuid()}-{port}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+class Segment:
+    def __init__(self, path, size):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self.lock():
+            if os.fstat(self.fd).st_size < size:
+                os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+
+    @contextlib.contextmanager
+    def lock(self):
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+class SharedValue:
+    def __init__(self, name, directory=SHARED_CACHE_DIR, size=VALUE_SIZE):
+        self.segment = Segment(os.path.join(directory, f"{name}.shm"), size)
+        self.map = self.segment.map
+        self.capacity = size - _PAYLOAD
+
+    def read(self):
+        """Return (updated_at, value), or None if nothing was written yet."""
+        for _ in range(READ_SPINS):
+            seq, length, updated_at, _ = _HEADER.unpack_from(self.map, 0)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            payload = self.map[_PAYLOAD:_PAYLOAD + length]
+            if _HEADER.unpack_from(self.map, 0)[0] == seq:
+                break
+        else:
+            # Still mid-write: take the writers' lock. An odd seq under the
+            # lock means a writer died halfway, so the value is discarded.
+            with self.segment.lock():
+                seq, length, updated_at, claimed_at = _HEADER.unpack_from(self.map, 0)
+                if seq & 1:
+                    logging.warning("Repairing torn shared value %s", self.segment.path)
+                    _HEADER.pack_into(self.map, 0, seq + 1, 0, 0.0, claimed_at)
+                    return None
+                payload = self.map[_PAYLOAD:_PAYLOAD + length]
+        if not length:
+            return None
+        return updated_at, json.loads(payload)
+
+    def write(self, updated_at, value):
+        payload = json.dumps(value).encode()
+        if len(payload) > self.capacity:
+            raise ValueError(f"shared value too large ({len(payload)} bytes)")
+        with self.segment.lock():
+            seq, _, _, claimed_at = _HEADER.unpack_from(self.map, 0)
+            _HEADER.pack_into(self.map, 0, seq + 1, 0, 0.0, claimed_at)
+            self.map[_PAYLOAD:_PAYLOAD + len(payload)] = payload
+            _HEADER.pack_into(self.map, 0, seq + 2, len(payload), updated_at, 0.0)
+
+    def claim(self, fresh_for, timeout):
+        """True if the caller should refresh: the value is older than
+        fresh_for and no other worker claimed it within timeout."""
+        now = time.time()
+        with self.segment.lock():
+            seq, length, updated_at, claimed_at = _HEADER.unpack_from(self.map, 0)
+            if length and now - updated_at < fresh_for:
+                return False
+            if now - claimed_at < timeout:
+                return False
+            _HEADER.pack_into(self.map, 0, seq, length, updated_at, now)
+            return True
+
+
+class Lease:
+    """Leadership through an exclusive flock; always held without a directory."""
+
+    def __init__(self, directory=SHARED_CACHE_DIR, name="webhook.lock"):
+        self.path = os.path.join(directory, name) if directory else None
+        self.fd = None
+        self.held = self.path is None
+        self._task = None
+
+    def try_acquire(self):
+        if self.held:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self.fd = fd
+        self.held = True
+        return True
+
+    async def _campaign(self, on_elected, interval):
+        while not self.try_acquire():
+            await asyncio.sleep(interval)
+        logging.info("👑 Worker %s took over as leader", os.getpid())
+        await on_elected(initial=False)
+
+    def watch(self, on_elected, interval=LEADER_RETRY_SECONDS):
+        """Retry in the background; await on_elected(initial=False) once won."""
+        if self._task is None and not self.held:
+            self._task = asyncio.create_task(self._campaign(on_elected, interval))
+
+    async def release(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
+            self.held = False
+
+
+def value(name):
+    """A SharedValue when multi-worker mode is on, else None."""
+    return SharedValue(name) if SHARED_CACHE_DIR else None
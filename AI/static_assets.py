@@ -0,0 +1,107 @@
+import os
+import json
+import logging
+from starlette.responses import Response
+from starlette.routing import Route
+from build_assets import STATIC_DIR
+
+# --- Static site serving ---
+# Serves the output of build_assets.py from memory. Every variant's bytes
+# and ETag are loaded once at startup; a request only picks a variant:
+#   - images: AVIF or WebP when the Accept header allows, else the fallback
+#   - HTML/JSON: brotli or gzip when Accept-Encoding allows, else plain
+# If-None-Match is answered with 304. Hashed /assets/ URLs are cached as
+# immutable; index.html and manifest.json revalidate on every load.
+
+
+def _accepts(header, token):
+    """True if header lists token with a non-zero q-value."""
+    for item in header.split(","):
+        name, *params = item.split(";")
+        if name.strip().lower() != token:
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def _etag_match(header, etag):
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class StaticAssets:
+    def __init__(self, root=STATIC_DIR):
+        self.root = root
+        self.routes = {}
+        path = os.path.join(root, "assets.json")
+        if not os.path.exists(path):
+            logging.warning("No built assets in %s (run build_assets.py)", root)
+            return
+        with open(path) as f:
+            table = json.load(f)
+        blobs = {}
+        for url, route in table.items():
+            variants = []
+            for v in route["variants"]:
+                if v["file"] not in blobs:
+                    with open(os.path.join(root, v["file"]), "rb") as f:
+                        blobs[v["file"]] = f.read()
+                headers = {"ETag": v["etag"], "Cache-Control": route["cache"]}
+                if v["encoding"]:
+                    headers["Content-Encoding"] = v["encoding"]
+                variants.append((v["accept"], v["encoding"], v["type"], blobs[v["file"]], headers))
+            vary = []
+            if any(v[0] for v in variants):
+                vary.append("Accept")
+            if any(v[1] for v in variants):
+                vary.append("Accept-Encoding")
+            if vary:
+                for v in variants:
+                    v[4]["Vary"] = ", ".join(vary)
+            self.routes[url] = variants
+        logging.info("🗂️ Serving %d static routes (%d KB in memory)",
+                     len(self.routes), sum(map(len, blobs.values())) // 1024)
+
+    def pick(self, path, accept="", accept_encoding=""):
+        variants = self.routes.get(path)
+        if variants is None:
+            return None
+        for v in variants:
+            if v[0] and not _accepts(accept, v[0]):
+                continue
+            if v[1] and not _accepts(accept_encoding, v[1]):
+                continue
+            return v
+        return variants[-1]
+
+    async def serve(self, request):
+        v = self.pick(
+            request.url.path,
+            request.headers.get("accept", ""),
+            request.headers.get("accept-encoding", ""),
+        )
+        if v is None:
+            return Response("Not Found", status_code=404, media_type="text/plain")
+        _, _, media_type, body, headers = v
+        if _etag_match(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        if request.method == "HEAD":
+            headers = dict(headers, **{"Content-Length": str(len(body))})
+            return Response(status_code=200, headers=headers, media_type=media_type)
+        return Response(body, media_type=media_type, headers=headers)
+
+    def route(self, path="/{path:path}"):
+        """A catch-all Starlette route; register it after the app's own routes."""
+        return Route(path, self.serve, methods=["GET", "HEAD"])
@@ -0,0 +1,210 @@
+import os
+import time
+import asyncio
+import logging
+import sqlite3
+from collections import OrderedDict
+
+# --- Local user store (SQLite, WAL) ---
+# bot.db is the bot's one embedded database, and this module owns it:
+# connection() is the single per-process connection that broadcast.py,
+# holders.py and media.py share, each adding its tables with
+# register_schema(). Everything runs on the event loop thread, and every
+# transaction opens and closes within one synchronous call, so sharing the
+# connection needs no locking. The busy timeout is short (STORE_BUSY_TIMEOUT)
+# because a wait blocks the loop; callers treat "database is locked" as a
+# retryable error.
+#
+# Users, claim timestamps and key counts live in the users table. Reads go through an LRU of hot users. Writes only change
+# the cached record and mark it dirty; a background task writes dirty rows
+# in one transaction every STORE_FLUSH_SECONDS, or sooner once
+# STORE_FLUSH_BATCH rows are waiting. A crash loses at most that window.
+#
+# With several web workers on one bot.db (write_through=True) the cache would
+# let a user claim once per worker, and each worker's flush would overwrite
+# the others' counts. Claims then skip the cache and run as one conditional
+# UPDATE inside an IMMEDIATE transaction, so the cooldown is checked by SQLite.
+
+BOT_DB_PATH = os.getenv("BOT_DB_PATH", "bot.db")
+STORE_BUSY_TIMEOUT = float(os.getenv("STORE_BUSY_TIMEOUT", "0.2"))
+STORE_CACHE_SIZE = int(os.getenv("STORE_CACHE_SIZE", "10000"))
+STORE_FLUSH_SECONDS = float(os.getenv("STORE_FLUSH_SECONDS", "1"))
+STORE_FLUSH_BATCH = int(os.getenv("STORE_FLUSH_BATCH", "500"))
+CLAIM_COOLDOWN_SECONDS = float(os.getenv("CLAIM_COOLDOWN_SECONDS", "600"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    first_seen REAL NOT NULL,
+    last_claim REAL NOT NULL DEFAULT 0,
+    claims INTEGER NOT NULL DEFAULT 0,
+    keys INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Fixed statement text so sqlite3's statement cache reuses the prepared form.
+_SELECT_USER = "SELECT user_id, first_seen, last_claim, claims, keys FROM users WHERE user_id = ?"
+_UPSERT_USER = (
+    "INSERT INTO users (user_id, first_seen, last_claim, claims, keys) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET last_claim = excluded.last_claim, "
+    "claims = excluded.claims, keys = excluded.keys"
+)
+_FIELDS = ("user_id", "first_seen", "last_claim", "claims", "keys")
+_INSERT_USER = "INSERT OR IGNORE INTO users (user_id, first_seen) VALUES (?, ?)"
+_CLAIM_USER = (
+    "UPDATE users SET last_claim = ?, claims = claims + 1, keys = keys + 1 "
+    "WHERE user_id = ? AND last_claim <= ?"
+)
+
+
+_schemas = [SCHEMA]
+_db = None
+
+
+def register_schema(sql):
+    """Add a module's CREATE TABLE IF NOT EXISTS script to bot.db."""
+    if sql not in _schemas:
+        _schemas.append(sql)
+        if _db is not None:
+            _db.executescript(sql)
+
+
+def connect(path=BOT_DB_PATH, timeout=STORE_BUSY_TIMEOUT):
+    """A new connection with every registered schema applied."""
+    db = sqlite3.connect(path, timeout=timeout, isolation_level=None, cached_statements=64)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    for sql in _schemas:
+        db.executescript(sql)
+    return db
+
+
+def connection():
+    """The process-wide bot.db connection."""
+    global _db
+    if _db is None:
+        _db = connect()
+    return _db
+
+
+class Store:
+    def __init__(self, db=None, cache_size=STORE_CACHE_SIZE,
+                 flush_interval=STORE_FLUSH_SECONDS, flush_batch=STORE_FLUSH_BATCH,
+                 write_through=False):
+        self.db = db or connection()
+        self.write_through = write_through
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.cache = OrderedDict()
+        self.dirty = {}
+        self._wake = asyncio.Event()
+        self._task = None
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+    def get_user(self, user_id):
+        user = self.cache.get(user_id)
+        if user is not None:
+            self.cache.move_to_end(user_id)
+            self.hits += 1
+            return user
+        self.misses += 1
+        user = self.dirty.get(user_id)
+        if user is None:
+            row = self.db.execute(_SELECT_USER, (user_id,)).fetchone()
+            if row is not None:
+                user = dict(zip(_FIELDS, row))
+            else:
+                user = {"user_id": user_id, "first_seen": time.time(), "last_claim": 0.0, "claims": 0, "keys": 0}
+        self.cache[user_id] = user
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return user
+
+    def save(self, user):
+        self.dirty[user["user_id"]] = user
+        if len(self.dirty) >= self.flush_batch:
+            self._wake.set()
+
+    def claim(self, user_id, cooldown=CLAIM_COOLDOWN_SECONDS, now=None):
+        """Grant one Blue Key if the cooldown has passed.
+
+        Returns (claimed, user, seconds_left).
+        """
+        now = time.time() if now is None else now
+        if self.write_through:
+            return self._claim_sql(user_id, cooldown, now)
+        user = self.get_user(user_id)
+        left = user["last_claim"] + cooldown - now
+        if left > 0:
+            return False, user, left
+        user["last_claim"] = now
+        user["claims"] += 1
+        user["keys"] += 1
+        self.save(user)
+        return True, user, cooldown
+
+    def _claim_sql(self, user_id, cooldown, now):
+        try:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute(_INSERT_USER, (user_id, now))
+            claimed = self.db.execute(_CLAIM_USER, (now, user_id, now - cooldown)).rowcount == 1
+            user = dict(zip(_FIELDS, self.db.execute(_SELECT_USER, (user_id,)).fetchone()))
+            self.db.execute("COMMIT")
+        except Exception:
+            if self.db.in_transaction:
+                self.db.execute("ROLLBACK")
+            raise
+        if claimed:
+            return True, user, cooldown
+        return False, user, user["last_claim"] + cooldown - now
+
+    def flush(self):
+        if not self.dirty:
+            return
+        pending, self.dirty = self.dirty, {}
+        try:
+            self.db.execute("BEGIN")
+            self.db.executemany(_UPSERT_USER, [tuple(u[f] for f in _FIELDS) for u in pending.values()])
+            self.db.execute("COMMIT")
+            self.flushes += 1
+        except Exception as e:
+            if self.db.in_transaction:
+                self.db.execute("ROLLBACK")
+            logging.error("Store flush error: %s", e)
+            for user_id, user in pending.items():
+                self.dirty.setdefault(user_id, user)
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+    def stats(self):
+        return {
+            "cached": len(self.cache),
+            "dirty": len(self.dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "flushes": self.flushes,
+        }
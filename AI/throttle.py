@@ -0,0 +1,157 @@
+import os
+import time
+import hashlib
+from array import array
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, TypeHandler
+import shared
+
+# --- Anti-spam throttle ---
+# Runs before every command handler (group -2). Each command has a limit of
+# N calls per period, checked with GCRA per user and per chat (the chat
+# allowance is THROTTLE_CHAT_FACTOR times the user one). State lives in a
+# fixed-size hashed table, so memory stays bounded however many ids show up:
+# an expired slot is as good as empty and simply gets reused.
+#
+# THROTTLE_LIMITS="ai=3/60,price=10/60,*=20/60"   (calls/seconds, * = default)
+
+THROTTLE_LIMITS = os.getenv("THROTTLE_LIMITS", "ai=3/60,price=10/60,leaderboard=5/60,claim=5/60,*=20/60")
+THROTTLE_CHAT_FACTOR = float(os.getenv("THROTTLE_CHAT_FACTOR", "3"))
+THROTTLE_TABLE_SIZE = int(os.getenv("THROTTLE_TABLE_SIZE", "65536"))
+SLOW_DOWN_TEXT = "🐢 Slow down a little — try again in a few seconds."
+
+
+def parse_limits(spec):
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, rate = item.strip().partition("=")
+        count, _, period = rate.partition("/")
+        limits[name] = (int(count), float(period))
+    return limits
+
+
+class RateTable:
+    """GCRA state in a fixed-size, two-choice hashed table."""
+
+    def __init__(self, size=THROTTLE_TABLE_SIZE):
+        self.mask = size - 1
+        assert size & self.mask == 0, "table size must be a power of two"
+        self.keys = [None] * size
+        self.tat = array("d", bytes(8 * size))  # theoretical arrival time
+        self.warned = bytearray(size)
+
+    def _slot(self, key):
+        h = hash(key)
+        a, b = h & self.mask, (h >> 16) & self.mask
+        keys, tat = self.keys, self.tat
+        if keys[a] == key:
+            return a
+        if keys[b] == key:
+            return b
+        # Claim whichever slot has been idle longest (expired slots first).
+        slot = a if tat[a] <= tat[b] else b
+        keys[slot] = key
+        tat[slot] = 0.0
+        self.warned[slot] = 0
+        return slot
+
+    def hit(self, key, count, period, now):
+        """Return (allowed, slot)."""
+        slot = self._slot(key)
+        interval = period / count
+        tat = max(self.tat[slot], now)
+        if tat - now > period - interval:
+            return False, slot
+        self.tat[slot] = tat + interval
+        self.warned[slot] = 0
+        return True, slot
+
+
+class SharedRateTable(RateTable):
+    """RateTable in a shared.Segment so every worker enforces one limit.
+
+    Keys become 64-bit fingerprints (Python's hash() differs per process);
+    each hit() runs under the segment's lock.
+    """
+
+    def __init__(self, directory=shared.SHARED_CACHE_DIR, size=THROTTLE_TABLE_SIZE):
+        self.mask = size - 1
+        assert size & self.mask == 0, "table size must be a power of two"
+        self.segment = shared.Segment(os.path.join(directory, "throttle.shm"), 17 * size)
+        view = memoryview(self.segment.map)
+        self.tat = view[:8 * size].cast("d")
+        self.keys = view[8 * size:16 * size].cast("q")
+        self.warned = view[16 * size:17 * size]
+
+    def _slot(self, key):
+        fp = int.from_bytes(hashlib.blake2b(repr(key).encode(), digest_size=8).digest(), "little", signed=True) or 1
+        a, b = fp & self.mask, (fp >> 16) & self.mask
+        keys, tat = self.keys, self.tat
+        if keys[a] == fp:
+            return a
+        if keys[b] == fp:
+            return b
+        slot = a if tat[a] <= tat[b] else b
+        keys[slot] = fp
+        tat[slot] = 0.0
+        self.warned[slot] = 0
+        return slot
+
+    def hit(self, key, count, period, now):
+        with self.segment.lock():
+            return super().hit(key, count, period, now)
+
+
+class Throttle:
+    def __init__(self, limits=THROTTLE_LIMITS, chat_factor=THROTTLE_CHAT_FACTOR, table=None):
+        self.limits = parse_limits(limits) if isinstance(limits, str) else limits
+        self.default = self.limits.get("*", (20, 60.0))
+        self.chat_factor = chat_factor
+        self.table = table or RateTable()
+        # Wall-clock time when the table is shared: monotonic clocks are not
+        # guaranteed to agree across processes.
+        self.clock = time.time if isinstance(self.table, SharedRateTable) else time.monotonic
+        self.allowed = 0
+        self.throttled = 0
+
+    def check(self, user_id, chat_id, command, now=None):
+        """Return None if allowed, else the slot that tripped."""
+        now = self.clock() if now is None else now
+        count, period = self.limits.get(command, self.default)
+        ok, slot = self.table.hit((user_id, command), count, period, now)
+        if ok and chat_id is not None and chat_id != user_id:
+            ok, slot = self.table.hit((chat_id, command), max(1, int(count * self.chat_factor)), period, now)
+        if ok:
+            self.allowed += 1
+            return None
+        self.throttled += 1
+        return slot
+
+    async def __call__(self, update, context):
+        message = update.message
+        if message is None or not message.text or not message.text.startswith("/"):
+            return
+        parts = message.text[1:].split(maxsplit=1)
+        if not parts:
+            return
+        command, _, target = parts[0].partition("@")
+        # /cmd@OtherBot in a group is not ours to count or answer.
+        if target and target.lower() != (update.get_bot().username or "").lower():
+            return
+        user = update.effective_user
+        slot = self.check(user.id if user else None, update.effective_chat.id, command.lower())
+        if slot is None:
+            return
+        # One "slow down" per throttled streak, not one per message.
+        if not self.table.warned[slot]:
+            self.table.warned[slot] = 1
+            await message.reply_text(SLOW_DOWN_TEXT)
+        raise ApplicationHandlerStop
+
+    def handler(self):
+        return TypeHandler(Update, self)
+
+    def stats(self):
+        return {"allowed": self.allowed, "throttled": self.throttled}
@@ -0,0 +1,125 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+
+# --- Webhook update queue ---
+# /telegram parses the update, drops it on a bounded queue and answers 200
+# straight away. A fixed pool of workers drains the queue into
+# Application.process_update. When the queue is full the webhook answers 503
+# so Telegram backs off and redelivers later instead of piling up requests.
+#
+# Updates are sharded into per-chat lanes: a chat's updates run one at a time
+# in arrival order, while different chats run concurrently on the shared
+# workers. A lane only exists while it has pending or running work, so idle
+# chats cost nothing.
+#
+# Ordering holds within one process only. With WEB_WORKERS > 1 the kernel
+# spreads webhook connections over the workers, so two updates from the same
+# chat can land in different processes and run concurrently or out of order.
+
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+WEBHOOK_DRAIN_SECONDS = float(os.getenv("WEBHOOK_DRAIN_SECONDS", "10"))
+
+
+def chat_key(update):
+    chat = getattr(update, "effective_chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(update, "effective_user", None)
+    if user is not None:
+        return ("user", user.id)
+    return ("update", getattr(update, "update_id", id(update)))
+
+
+class UpdateQueue:
+    def __init__(self, process, workers=WEBHOOK_WORKERS, maxsize=WEBHOOK_QUEUE_SIZE, key=chat_key):
+        self.process = process
+        self.workers = workers
+        self.maxsize = maxsize
+        self.key = key
+        # key -> deque of (enqueued_at, update); present while the lane is busy
+        self.lanes = {}
+        # keys of lanes waiting for a worker; each busy lane appears at most once
+        self.ready = asyncio.Queue()
+        self.pending = 0
+        self._tasks = []
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.high_water = 0
+        self.wait_total = 0.0
+
+    def put(self, update):
+        """Enqueue without waiting. Returns False when the queue is full."""
+        if self.pending >= self.maxsize:
+            self.rejected += 1
+            return False
+        key = self.key(update)
+        lane = self.lanes.get(key)
+        if lane is None:
+            lane = self.lanes[key] = deque()
+            self.ready.put_nowait(key)
+        lane.append((time.monotonic(), update))
+        self.pending += 1
+        self.accepted += 1
+        self.high_water = max(self.high_water, self.pending)
+        return True
+
+    async def _worker(self):
+        while True:
+            key = await self.ready.get()
+            lane = self.lanes[key]
+            enqueued_at, update = lane.popleft()
+            self.pending -= 1
+            self.wait_total += time.monotonic() - enqueued_at
+            self.in_flight += 1
+            try:
+                await self.process(update)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                logging.error("Update processing error: %s", e)
+            finally:
+                self.in_flight -= 1
+                # One update per turn keeps busy chats from starving others.
+                if lane:
+                    self.ready.put_nowait(key)
+                else:
+                    del self.lanes[key]
+                self.ready.task_done()
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout=WEBHOOK_DRAIN_SECONDS):
+        # Let queued updates finish before the Application shuts down.
+        try:
+            await asyncio.wait_for(self.ready.join(), timeout)
+        except asyncio.TimeoutError:
+            logging.warning("⚠️ Update queue drain timed out with %d pending", self.pending)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self):
+        done = self.processed + self.errors
+        return {
+            "depth": self.pending,
+            "capacity": self.maxsize,
+            "lanes": len(self.lanes),
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "high_water": self.high_water,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "errors": self.errors,
+            "avg_wait_ms": round(self.wait_total / done * 1000, 2) if done else 0.0,
+        }